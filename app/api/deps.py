@@ -3,58 +3,99 @@
 from __future__ import annotations
 
 import logging
-from typing import Annotated, Any, AsyncGenerator, Dict
+import secrets
+from functools import lru_cache
+from typing import Annotated, Any, Dict
 
 from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBasicCredentials
-from psycopg import AsyncConnection
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBasicCredentials
+from psycopg_pool import AsyncConnectionPool
 from redis.asyncio import Redis
 
 from app.core.config import Settings, get_settings as load_settings
-from app.core.database import get_db_conn
+from app.core.credential_cache import get_credential_cache
+from app.core.database import get_pool
 from app.core.redis import get_redis_client
 from app.core.security import (
     ensure_basic_credentials,
     get_basic_scheme,
-    verify_password,
+    get_bearer_scheme,
+    read_session_token,
+    verify_password_async,
 )
 from app.repositories.activation import ActivationRepository
+from app.repositories.outbox import OutboxRepository
+from app.repositories.redis_activation import RedisActivationRepository
 from app.repositories.user import UserRepository
-from app.services.email import CeleryEmailService, EmailService
+from app.services.email import (
+    CeleryEmailService,
+    EmailService,
+    OutboxEmailService,
+    RedisStreamEmailService,
+)
 from app.services.rate_limiter import RateLimiter
 from app.services.user import UserService
 
 _LOGGER = logging.getLogger(__name__)
 _BASIC_SCHEME = get_basic_scheme()
+_BEARER_SCHEME = get_bearer_scheme()
 
 
 async def get_settings() -> Settings:
     return load_settings()
 
 
-async def get_db_connection() -> AsyncGenerator[AsyncConnection, None]:
-    async with get_db_conn() as conn:
-        yield conn
+# Repositories check connections out of the pool per statement or unit of work,
+# so a request never holds one while it hashes passwords or waits on Redis.
+async def get_db_pool() -> AsyncConnectionPool:
+    return get_pool()
 
 
 async def get_user_repository(
-    connection: Annotated[AsyncConnection, Depends(get_db_connection)],
+    pool: Annotated[AsyncConnectionPool, Depends(get_db_pool)],
 ) -> UserRepository:
-    return UserRepository(connection)
+    return UserRepository(pool)
 
 
-async def get_activation_repository(
-    connection: Annotated[AsyncConnection, Depends(get_db_connection)],
-) -> ActivationRepository:
-    return ActivationRepository(connection)
+# Sync dependencies are run in the threadpool, so even trivial providers are async.
+async def get_redis() -> Redis:
+    return get_redis_client()
 
 
-def get_email_service() -> EmailService:
-    return CeleryEmailService()
+# The rate limiter and the Redis code store register their Lua scripts, which
+# hashes them, when built; they hold no other state, so one is kept per client.
+@lru_cache(maxsize=4)
+def _redis_activation_repository(redis_client: Redis) -> RedisActivationRepository:
+    return RedisActivationRepository(redis_client)
 
 
-def get_redis() -> Redis:
-    return get_redis_client()
+@lru_cache(maxsize=4)
+def _rate_limiter(redis_client: Redis) -> RateLimiter:
+    return RateLimiter(redis_client)
+
+
+async def get_activation_repository(
+    pool: Annotated[AsyncConnectionPool, Depends(get_db_pool)],
+    redis_client: Annotated[Redis, Depends(get_redis)],
+    settings: Annotated[Settings, Depends(get_settings)],
+) -> ActivationRepository | RedisActivationRepository:
+    if settings.activation_code_store == "redis":
+        return _redis_activation_repository(redis_client)
+    return ActivationRepository(pool)
+
+
+async def get_email_service(
+    pool: Annotated[AsyncConnectionPool, Depends(get_db_pool)],
+    redis_client: Annotated[Redis, Depends(get_redis)],
+    settings: Annotated[Settings, Depends(get_settings)],
+) -> EmailService:
+    if settings.email_dispatch == "outbox":
+        return OutboxEmailService(OutboxRepository(pool))
+    if settings.email_dispatch == "stream":
+        return RedisStreamEmailService(
+            redis_client, settings.email_stream_name, settings.email_stream_maxlen
+        )
+    return CeleryEmailService()
 
 
 async def get_user_service(
@@ -71,10 +112,10 @@ async def get_user_service(
     )
 
 
-def get_rate_limiter(
+async def get_rate_limiter(
     redis_client: Annotated[Redis, Depends(get_redis)],
 ) -> RateLimiter:
-    return RateLimiter(redis_client)
+    return _rate_limiter(redis_client)
 
 
 async def authenticate_basic_user(
@@ -83,6 +124,11 @@ async def authenticate_basic_user(
 ) -> Dict[str, Any]:
     username, password = ensure_basic_credentials(credentials)
 
+    cache = get_credential_cache()
+    cached = cache.get(username, password)
+    if cached is not None:
+        return cached
+
     user = await users.get_user_by_email(username)
     if user is None:
         _LOGGER.warning("Authentication failed: user not found", extra={"email": username})
@@ -92,7 +138,7 @@ async def authenticate_basic_user(
             headers={"WWW-Authenticate": "Basic"},
         )
 
-    if not verify_password(password, user["password_hash"]):
+    if not await verify_password_async(password, user["password_hash"]):
         _LOGGER.warning("Authentication failed: bad password", extra={"email": username})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -102,11 +148,57 @@ async def authenticate_basic_user(
 
     sanitized = dict(user)
     sanitized.pop("password_hash", None)
+    cache.set(username, password, sanitized)
     return sanitized
 
 
+async def get_basic_authenticated_user(
+    credentials: Annotated[HTTPBasicCredentials | None, Depends(_BASIC_SCHEME)],
+    users: Annotated[UserRepository, Depends(get_user_repository)],
+) -> Dict[str, Any]:
+    return await authenticate_basic_user(credentials, users)
+
+
+async def get_partner(
+    credentials: Annotated[HTTPBasicCredentials | None, Depends(_BASIC_SCHEME)],
+    settings: Annotated[Settings, Depends(get_settings)],
+) -> str:
+    """Accept only the service credentials configured for partner integrations."""
+    username, password = ensure_basic_credentials(credentials)
+    valid_username = secrets.compare_digest(
+        username.encode("utf-8"), settings.basic_auth_username.encode("utf-8")
+    )
+    valid_password = secrets.compare_digest(
+        password.encode("utf-8"), settings.basic_auth_password.encode("utf-8")
+    )
+    if not (valid_username and valid_password):
+        _LOGGER.warning("Authentication failed: invalid partner credentials")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Basic"},
+        )
+    return username
+
+
+def authenticate_session_token(token: str, settings: Settings) -> Dict[str, Any]:
+    user = read_session_token(token, secret_key=settings.secret_key)
+    if user is None:
+        _LOGGER.warning("Authentication failed: invalid or expired session token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
 async def get_authenticated_user(
     credentials: Annotated[HTTPBasicCredentials | None, Depends(_BASIC_SCHEME)],
+    bearer: Annotated[HTTPAuthorizationCredentials | None, Depends(_BEARER_SCHEME)],
     users: Annotated[UserRepository, Depends(get_user_repository)],
+    settings: Annotated[Settings, Depends(get_settings)],
 ) -> Dict[str, Any]:
+    if bearer is not None:
+        return authenticate_session_token(bearer.credentials, settings)
     return await authenticate_basic_user(credentials, users)
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 
-from app.api.routes import auth, health
+from app.api.routes import auth, health, metrics
 
 api_router = APIRouter()
 api_router.include_router(health.router, prefix="/health", tags=["health"])
-api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
+api_router.include_router(auth.router, tags=["auth"])
+api_router.include_router(metrics.router)
@@ -2,13 +2,20 @@ from __future__ import annotations
 
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, status
 
 from app.api.deps import (
     get_authenticated_user,
+    get_basic_authenticated_user,
+    get_partner,
     get_rate_limiter,
+    get_settings,
     get_user_service,
 )
+from app.api.routing import TimedRoute
+from app.core import constants
+from app.core.config import Settings
+from app.core.security import create_session_token
 from app.models.activation import ActivationVerify
 from app.models.user import UserCreate
 from app.services.user import (
@@ -18,7 +25,8 @@ from app.services.user import (
 )
 from app.services.rate_limiter import RateLimitExceeded, RateLimiter
 
-router = APIRouter()
+# The prefix lives on the router so TimedRoute sees the full path as its label.
+router = APIRouter(prefix="/auth", route_class=TimedRoute)
 
 
 def _retry_after_headers(exc: RateLimitExceeded) -> dict[str, str]:
@@ -27,13 +35,22 @@ def _retry_after_headers(exc: RateLimitExceeded) -> dict[str, str]:
     return {"Retry-After": str(exc.retry_after)}
 
 
+def _session_token(user: dict[str, Any], settings: Settings) -> str:
+    return create_session_token(
+        user,
+        secret_key=settings.secret_key,
+        ttl_seconds=settings.session_token_ttl_seconds,
+    )
+
+
 @router.post("/register", status_code=status.HTTP_201_CREATED)
 async def register_user(
     payload: UserCreate,
     service: Annotated[UserService, Depends(get_user_service)],
+    settings: Annotated[Settings, Depends(get_settings)],
 ) -> dict[str, str]:
     try:
-        await service.register(payload.email, payload.password)
+        result = await service.register(payload.email, payload.password)
     except UserAlreadyActiveError as exc:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Account already active"
@@ -43,7 +60,45 @@ async def register_user(
             status_code=status.HTTP_409_CONFLICT, detail="Activation code already issued"
         ) from exc
 
-    return {"detail": "Activation email sent"}
+    user = {"id": result.user_id, "email": result.email, "is_active": False}
+    return {"detail": "Activation email sent", "token": _session_token(user, settings)}
+
+
+@router.post("/register/batch", status_code=status.HTTP_200_OK)
+async def register_users_batch(
+    payload: Annotated[
+        list[UserCreate],
+        Body(min_length=1, max_length=constants.REGISTER_BATCH_MAX_SIZE),
+    ],
+    _partner: Annotated[str, Depends(get_partner)],
+    service: Annotated[UserService, Depends(get_user_service)],
+    settings: Annotated[Settings, Depends(get_settings)],
+) -> dict[str, list[dict[str, Any]]]:
+    """Register up to ``REGISTER_BATCH_MAX_SIZE`` users in one request.
+
+    Partners authenticate with the configured ``BASIC_AUTH_USERNAME`` and
+    ``BASIC_AUTH_PASSWORD``.
+
+    Every item gets a result in request order: ``created`` (with a session token,
+    as from ``/register``), ``pending`` or ``active`` for emails already registered.
+    """
+    results = await service.register_batch([(user.email, user.password) for user in payload])
+    items = []
+    for result in results:
+        item: dict[str, Any] = {"email": result.email, "status": result.status}
+        if result.status == "created":
+            user = {"id": result.user_id, "email": result.email, "is_active": False}
+            item["token"] = _session_token(user, settings)
+        items.append(item)
+    return {"results": items}
+
+
+@router.post("/token", status_code=status.HTTP_200_OK)
+async def issue_token(
+    current_user: Annotated[dict[str, Any], Depends(get_basic_authenticated_user)],
+    settings: Annotated[Settings, Depends(get_settings)],
+) -> dict[str, str]:
+    return {"token": _session_token(current_user, settings), "token_type": "bearer"}
 
 
 @router.post("/resend", status_code=status.HTTP_202_ACCEPTED)
@@ -64,9 +119,14 @@ async def resend_activation_code(
     try:
         await service.request_activation_code(email)
     except UserAlreadyActiveError as exc:
+        await limiter.release_resend(email)
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Account already active"
         ) from exc
+    except Exception:
+        # Nothing was sent, so the failure doesn't count against the user's window.
+        await limiter.release_resend(email)
+        raise
 
     await limiter.record_resend(email)
 
@@ -1,4 +1,8 @@
-from fastapi import APIRouter
+from typing import Any
+
+from fastapi import APIRouter, Response, status
+
+from app.core.database import get_pool_stats
 
 router = APIRouter()
 
@@ -6,3 +10,12 @@ router = APIRouter()
 @router.get("/check")
 async def health_check() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness_check(response: Response) -> dict[str, Any]:
+    stats = get_pool_stats()
+    if stats is None:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "unavailable", "database_pool": None}
+    return {"status": "ready", "database_pool": stats}
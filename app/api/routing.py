@@ -0,0 +1,71 @@
+"""Route classes shared by the API routers."""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Coroutine
+
+from fastapi import Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+
+from app.core import metrics
+
+_REQUEST_SECONDS = metrics.Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling a request, by route.",
+    ("method", "route"),
+)
+_REQUESTS = metrics.Counter(
+    "http_requests_total",
+    "Requests handled, by route and status code.",
+    ("method", "route", "status"),
+)
+
+
+def _status_code(exc: Exception) -> int:
+    if isinstance(exc, RequestValidationError):
+        return 422
+    status_code = getattr(exc, "status_code", None)
+    return status_code if isinstance(status_code, int) else 500
+
+
+class TimedRoute(APIRoute):
+    """Records latency and status code metrics for every request to the route.
+
+    The route template (``/auth/register``) is used as the label rather than the
+    raw path, and the metric children are looked up once per route and status.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[None, None, Response]]:
+        handler = super().get_route_handler()
+        method = ",".join(sorted(self.methods or ()))
+        by_status: dict[int, metrics.CounterChild] = {}
+        # Resolved on first use: include_router() builds a prefixed copy of each
+        # route, and the unprefixed original should not leave an empty series.
+        latency: metrics.HistogramChild | None = None
+
+        def count(status_code: int) -> None:
+            counter = by_status.get(status_code)
+            if counter is None:
+                counter = by_status[status_code] = _REQUESTS.labels(
+                    method, self.path, str(status_code)
+                )
+            counter.inc()
+
+        async def timed_handler(request: Request) -> Response:
+            nonlocal latency
+            started = time.perf_counter()
+            try:
+                response = await handler(request)
+            except Exception as exc:
+                count(_status_code(exc))
+                raise
+            finally:
+                if latency is None:
+                    latency = _REQUEST_SECONDS.labels(method, self.path)
+                latency.observe(time.perf_counter() - started)
+            count(response.status_code)
+            return response
+
+        return timed_handler
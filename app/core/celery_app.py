@@ -15,6 +15,22 @@ celery_app = Celery(
 celery_app.conf.update(
     broker_connection_retry_on_startup=True,
     task_default_queue="default",
+    # Maintenance runs on its own solo-pool worker, so its metrics live in the one
+    # process that serves them (see app/tasks/maintenance.py).
+    task_routes={
+        "maintain_activation_code_partitions": {"queue": "maintenance"},
+        "purge_activation_codes": {"queue": "maintenance"},
+    },
+    beat_schedule={
+        "maintain-activation-code-partitions": {
+            "task": "maintain_activation_code_partitions",
+            "schedule": _settings.activation_code_partition_interval_seconds,
+        },
+        "purge-activation-codes": {
+            "task": "purge_activation_codes",
+            "schedule": _settings.activation_code_purge_interval_seconds,
+        },
+    },
 )
 
 celery_app.autodiscover_tasks(["app"])
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import EmailStr, HttpUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -6,6 +7,17 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     database_url: str
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 10
+    db_pool_timeout_seconds: float = 30
+    db_pool_max_waiting: int = 0
+    db_pool_max_idle_seconds: float = 10 * 60
+    db_pool_max_lifetime_seconds: float = 60 * 60
+    db_pool_reconnect_timeout_seconds: float = 5 * 60
+    db_pool_check_connections: bool = False
+    # Disable behind PgBouncer in transaction pooling mode (before 1.21, or without
+    # max_prepared_statements): server-side prepared statements don't survive there.
+    db_prepare_statements: bool = True
     redis_url: str
     email_api_url: HttpUrl | None = None
     system_email: EmailStr = "noreply@example.com"
@@ -13,8 +25,44 @@ class Settings(BaseSettings):
     basic_auth_password: str = "changeme"
     secret_key: str
     activation_code_ttl_seconds: int = 60
+    # "redis" keeps codes in Redis with native expiry, off the Postgres write path.
+    activation_code_store: Literal["postgres", "redis"] = "postgres"
+    # Expired codes, used or not, are deleted once they are this old.
+    activation_code_retention_seconds: int = 24 * 60 * 60
+    activation_code_purge_interval_seconds: float = 5 * 60
+    activation_code_purge_batch_size: int = 1000
+    activation_code_purge_pause_seconds: float = 0.1
+    activation_code_partition_days_ahead: int = 7
+    activation_code_partition_interval_seconds: float = 60 * 60
+    # Port for /metrics in the maintenance worker, whose counters the API can't see.
+    maintenance_metrics_port: int | None = None
     celery_broker_url: str | None = None
     celery_result_backend: str | None = None
+    password_hash_executor: Literal["thread", "process"] = "thread"
+    password_hash_workers: int | None = None
+    password_hash_max_pending: int = 64
+    credential_cache_max_entries: int = 10_000
+    credential_cache_ttl_seconds: float = 300
+    session_token_ttl_seconds: int = 15 * 60
+    email_dispatch: Literal["celery", "outbox", "stream"] = "celery"
+    email_publish_queue_size: int = 1000
+    email_outbox_batch_size: int = 100
+    email_outbox_poll_seconds: float = 1.0
+    email_bulk_api_url: HttpUrl | None = None
+    email_batch_size: int = 1
+    email_batch_window_seconds: float = 0.05
+    email_stream_name: str = "email:activation"
+    email_stream_group: str = "email-senders"
+    email_stream_maxlen: int = 100_000
+    email_stream_concurrency: int = 200
+    email_stream_max_attempts: int = 5
+    email_stream_backoff_seconds: float = 1.0
+    email_stream_claim_idle_ms: int = 60_000
+    email_http2: bool = False
+    email_http_timeout_seconds: float = 10
+    email_http_max_connections: int = 10
+    email_http_max_keepalive_connections: int = 10
+    email_http_keepalive_expiry_seconds: float = 30
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
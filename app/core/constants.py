@@ -9,6 +9,8 @@ RESEND_MINUTE_WINDOW_SECONDS = 60
 RESEND_DAILY_LIMIT = 5
 RESEND_DAILY_WINDOW_SECONDS = 24 * 60 * 60
 
+REGISTER_BATCH_MAX_SIZE = 500
+
 __all__ = [
     "ACTIVATION_ATTEMPT_LIMIT",
     "ACTIVATION_ATTEMPT_WINDOW_SECONDS",
@@ -17,4 +19,5 @@ __all__ = [
     "RESEND_MINUTE_WINDOW_SECONDS",
     "RESEND_DAILY_LIMIT",
     "RESEND_DAILY_WINDOW_SECONDS",
+    "REGISTER_BATCH_MAX_SIZE",
 ]
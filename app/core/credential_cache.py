@@ -0,0 +1,85 @@
+"""In-process cache of recently verified Basic auth credentials."""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import time
+from collections import OrderedDict
+from typing import Any, Dict
+
+from app.core.config import get_settings
+
+
+class CredentialCache:
+    """Bounded LRU/TTL cache mapping an email to its last verified credentials.
+
+    Entries hold a keyed digest of the password rather than the password itself,
+    together with the sanitized user row returned by the authentication dependency.
+    The cache is per process, so invalidation only reaches the current worker;
+    the TTL bounds how long other workers may serve a stale row.
+    """
+
+    def __init__(self, secret_key: str, *, max_entries: int, ttl_seconds: float) -> None:
+        self._secret = secret_key.encode("utf-8")
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[bytes, Dict[str, Any], float]] = OrderedDict()
+
+    def _digest(self, email: str, password: str) -> bytes:
+        message = f"{email}\x00{password}".encode("utf-8")
+        return hmac.new(self._secret, message, hashlib.sha256).digest()
+
+    def get(self, email: str, password: str) -> Dict[str, Any] | None:
+        entry = self._entries.get(email)
+        if entry is None:
+            return None
+
+        digest, user, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(email, None)
+            return None
+        if not hmac.compare_digest(digest, self._digest(email, password)):
+            return None
+
+        self._entries.move_to_end(email)
+        return dict(user)
+
+    def set(self, email: str, password: str, user: Dict[str, Any]) -> None:
+        if self._max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self._ttl_seconds
+        self._entries[email] = (self._digest(email, password), dict(user), expires_at)
+        self._entries.move_to_end(email)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, email: str) -> None:
+        self._entries.pop(email, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_CACHE: CredentialCache | None = None
+
+
+def get_credential_cache() -> CredentialCache:
+    """Return the singleton credential cache."""
+    global _CACHE
+    if _CACHE is None:
+        settings = get_settings()
+        _CACHE = CredentialCache(
+            settings.secret_key,
+            max_entries=settings.credential_cache_max_entries,
+            ttl_seconds=settings.credential_cache_ttl_seconds,
+        )
+    return _CACHE
+
+
+def reset_credential_cache() -> None:
+    global _CACHE
+    _CACHE = None
@@ -2,17 +2,35 @@
 
 from __future__ import annotations
 
+import logging
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from typing import Any, AsyncIterator
 
 from psycopg import AsyncConnection
 from psycopg_pool import AsyncConnectionPool
 
+from app.core import metrics
 from app.core.config import get_settings
 
+_LOGGER = logging.getLogger(__name__)
 _POOL: AsyncConnectionPool | None = None
 
 
+def _reconnect_failed(pool: AsyncConnectionPool) -> None:
+    _LOGGER.error(
+        "Database pool could not reconnect within the reconnect timeout",
+        extra={"pool": pool.name},
+    )
+
+
+def connection_options() -> dict[str, Any]:
+    """Keyword arguments for every connection the application opens."""
+    if get_settings().db_prepare_statements:
+        return {}
+    # None turns off psycopg's automatic preparation; repositories then skip it too.
+    return {"prepare_threshold": None}
+
+
 def get_pool() -> AsyncConnectionPool:
     """Return a singleton async connection pool."""
     global _POOL
@@ -20,20 +38,58 @@ def get_pool() -> AsyncConnectionPool:
         settings = get_settings()
         _POOL = AsyncConnectionPool(
             conninfo=settings.database_url,
-            min_size=1,
-            max_size=10,
-            timeout=30,
+            kwargs=connection_options(),
+            min_size=settings.db_pool_min_size,
+            max_size=settings.db_pool_max_size,
+            timeout=settings.db_pool_timeout_seconds,
+            max_waiting=settings.db_pool_max_waiting,
+            max_idle=settings.db_pool_max_idle_seconds,
+            max_lifetime=settings.db_pool_max_lifetime_seconds,
+            reconnect_timeout=settings.db_pool_reconnect_timeout_seconds,
+            reconnect_failed=_reconnect_failed,
+            check=(
+                AsyncConnectionPool.check_connection if settings.db_pool_check_connections else None
+            ),
             open=False,
         )
     return _POOL
 
 
+def _pool_samples() -> list[tuple[tuple[str, ...], float]]:
+    # Read-only: never creates the pool just to report on it.
+    stats = get_pool_stats()
+    if stats is None:
+        return []
+    return [((name,), value) for name, value in sorted(stats.items())]
+
+
+metrics.CallbackGauge(
+    "db_pool",
+    "AsyncConnectionPool statistics as reported by psycopg_pool get_stats().",
+    ("stat",),
+    callback=_pool_samples,
+)
+
+
 async def init_pool() -> AsyncConnectionPool:
+    """Open the pool and wait until ``min_size`` connections are established.
+
+    Failing here (after ``db_pool_timeout_seconds``) keeps a replica that can't
+    reach the database from starting, instead of paying connection setup on the
+    first requests.
+    """
     pool = get_pool()
-    await pool.open()
+    await pool.open(wait=True, timeout=get_settings().db_pool_timeout_seconds)
     return pool
 
 
+def get_pool_stats() -> dict[str, Any] | None:
+    """Return the pool's counters, or ``None`` if it isn't open."""
+    if _POOL is None or _POOL.closed:
+        return None
+    return _POOL.get_stats()
+
+
 async def close_pool() -> None:
     global _POOL
     if _POOL is not None:
@@ -2,16 +2,46 @@
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
 import logging
-from typing import Tuple
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Mapping, Sequence, Tuple, TypeVar
 
 from fastapi import HTTPException, status
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi.security import HTTPBasic, HTTPBasicCredentials, HTTPBearer
 from passlib.context import CryptContext
 
+from app.core import metrics
+from app.core.config import get_settings
+
+_T = TypeVar("_T")
+
 _LOGGER = logging.getLogger(__name__)
 _PWD_CONTEXT = CryptContext(schemes=["bcrypt"], deprecated="auto")
 _HTTP_BASIC_SCHEME = HTTPBasic(auto_error=False)
+_HTTP_BEARER_SCHEME = HTTPBearer(auto_error=False)
+
+
+_HASH_SECONDS = metrics.Histogram(
+    "password_hash_seconds",
+    "Time spent hashing or verifying one password in a worker.",
+    ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0),
+)
+_HASH_WAIT_SECONDS = metrics.Histogram(
+    "password_hash_wait_seconds",
+    "Time password hashing work waited for a free worker.",
+)
+_HASH_REJECTED = metrics.Counter(
+    "password_hash_rejected_total",
+    "Password hashing requests rejected because the pool was saturated.",
+)
 
 
 def hash_password(raw_password: str) -> str:
@@ -22,10 +52,205 @@ def verify_password(raw_password: str, hashed_password: str) -> bool:
     return _PWD_CONTEXT.verify(raw_password, hashed_password)
 
 
+def _timed_call(func: Callable[..., _T], *args: Any) -> tuple[_T, float]:
+    # Runs in the worker, so the measured time excludes waiting for the pool.
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool already has its maximum amount of queued work."""
+
+    status_code = 503
+
+
+class PasswordHasherPool:
+    """Bounded executor that keeps bcrypt work off the event loop.
+
+    At most ``max_workers`` hashes run in parallel and up to ``max_pending`` more
+    may wait for a free worker; anything beyond that fails fast with
+    :class:`PasswordHasherBusy` instead of queueing indefinitely.
+    """
+
+    def __init__(self, *, max_workers: int, max_pending: int, use_processes: bool = False) -> None:
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._use_processes = use_processes
+        self._executor: Executor | None = None
+        self._in_flight = 0
+        self._batch_slots: asyncio.Semaphore | None = None
+
+    @property
+    def batch_slots(self) -> asyncio.Semaphore:
+        """Workers that batch hashing may occupy at once, shared by every batch.
+
+        Half the pool (at least one), so single registrations and logins keep
+        the other workers even while batches are running.
+        """
+        if self._batch_slots is None:
+            self._batch_slots = asyncio.Semaphore(max(1, self._max_workers // 2))
+        return self._batch_slots
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self._use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="password-hasher"
+                )
+        return self._executor
+
+    async def run(self, func: Callable[..., _T], *args: Any) -> _T:
+        if self._in_flight >= self._max_workers + self._max_pending:
+            _LOGGER.warning("Password hashing pool saturated", extra=self.stats())
+            _HASH_REJECTED.inc()
+            raise PasswordHasherBusy("Password hashing capacity exhausted")
+
+        self._in_flight += 1
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, elapsed = await loop.run_in_executor(self.executor, _timed_call, func, *args)
+        finally:
+            self._in_flight -= 1
+        _HASH_SECONDS.labels(getattr(func, "__name__", "call")).observe(elapsed)
+        _HASH_WAIT_SECONDS.observe(max(0.0, time.perf_counter() - submitted - elapsed))
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        running = min(self._in_flight, self._max_workers)
+        return {
+            "executor": "process" if self._use_processes else "thread",
+            "max_workers": self._max_workers,
+            "max_pending": self._max_pending,
+            "running": running,
+            "queued": self._in_flight - running,
+            "utilisation": running / self._max_workers,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+_HASHER_POOL: PasswordHasherPool | None = None
+
+
+def get_password_hasher() -> PasswordHasherPool:
+    """Return the singleton pool used for password hashing."""
+    global _HASHER_POOL
+    if _HASHER_POOL is None:
+        settings = get_settings()
+        _HASHER_POOL = PasswordHasherPool(
+            max_workers=settings.password_hash_workers or os.cpu_count() or 1,
+            max_pending=settings.password_hash_max_pending,
+            use_processes=settings.password_hash_executor == "process",
+        )
+    return _HASHER_POOL
+
+
+def _hasher_samples() -> list[tuple[tuple[str, ...], float]]:
+    if _HASHER_POOL is None:
+        return []
+    stats = _HASHER_POOL.stats()
+    return [(("running",), stats["running"]), (("queued",), stats["queued"])]
+
+
+metrics.CallbackGauge(
+    "password_hasher_tasks",
+    "Password hashing calls currently running or queued.",
+    ("state",),
+    callback=_hasher_samples,
+)
+
+
+def close_password_hasher() -> None:
+    global _HASHER_POOL
+    if _HASHER_POOL is not None:
+        _HASHER_POOL.shutdown()
+        _HASHER_POOL = None
+
+
+async def hash_password_async(raw_password: str) -> str:
+    return await get_password_hasher().run(hash_password, raw_password)
+
+
+async def hash_passwords_async(raw_passwords: Sequence[str]) -> list[str]:
+    """Hash several passwords in parallel, in order.
+
+    Batches share :attr:`PasswordHasherPool.batch_slots`, so together they never
+    submit more than half the pool's workers and don't fill its pending queue.
+    """
+    pool = get_password_hasher()
+    slots = pool.batch_slots
+
+    async def hash_one(raw_password: str) -> str:
+        async with slots:
+            return await pool.run(hash_password, raw_password)
+
+    return list(await asyncio.gather(*(hash_one(password) for password in raw_passwords)))
+
+
+async def verify_password_async(raw_password: str, hashed_password: str) -> bool:
+    return await get_password_hasher().run(verify_password, raw_password, hashed_password)
+
+
 def get_basic_scheme() -> HTTPBasic:
     return _HTTP_BASIC_SCHEME
 
 
+def get_bearer_scheme() -> HTTPBearer:
+    return _HTTP_BEARER_SCHEME
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(secret_key: str, payload: str) -> str:
+    digest = hmac.new(secret_key.encode("utf-8"), payload.encode("utf-8"), hashlib.sha256)
+    return _b64encode(digest.digest())
+
+
+def create_session_token(user: Mapping[str, Any], *, secret_key: str, ttl_seconds: int) -> str:
+    """Return an HMAC-signed token carrying the user's id, email and activation state."""
+    claims = {
+        "sub": int(user["id"]),
+        "email": user["email"],
+        "active": bool(user["is_active"]),
+        "exp": int(time.time()) + ttl_seconds,
+    }
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_sign(secret_key, payload)}"
+
+
+def read_session_token(token: str, *, secret_key: str) -> Dict[str, Any] | None:
+    """Return the user encoded in ``token`` or ``None`` if it is invalid or expired."""
+    payload, _, signature = token.partition(".")
+    if not payload or not signature:
+        return None
+    if not hmac.compare_digest(signature, _sign(secret_key, payload)):
+        return None
+
+    try:
+        claims = json.loads(_b64decode(payload))
+        expires_at = int(claims["exp"])
+        user = {"id": claims["sub"], "email": claims["email"], "is_active": claims["active"]}
+    except (ValueError, TypeError, KeyError):
+        return None
+    if expires_at <= time.time():
+        return None
+    return user
+
+
 def ensure_basic_credentials(credentials: HTTPBasicCredentials | None) -> Tuple[str, str]:
     if credentials is None:
         _LOGGER.warning("Missing basic authentication credentials")
@@ -0,0 +1,7 @@
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    email TEXT NOT NULL,
+    code CHAR(4) NOT NULL,
+    ttl_seconds INTEGER NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
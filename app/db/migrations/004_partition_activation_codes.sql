@@ -0,0 +1,54 @@
+-- Range-partition activation_codes by day on created_at, so retention drops
+-- whole partitions instead of deleting rows. Daily partitions are named
+-- activation_codes_pYYYYMMDD (UTC days). app/tasks/maintenance.py creates them
+-- ahead of time and drops them once every code in them is past retention.
+-- Rows for a day without a partition land in activation_codes_default, which
+-- the row purge keeps small.
+DO $$
+DECLARE
+    day DATE;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('activation_codes')) IS DISTINCT FROM 'r' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE activation_codes RENAME TO activation_codes_unpartitioned;
+    ALTER TABLE activation_codes_unpartitioned
+        DROP CONSTRAINT activation_codes_pkey,
+        DROP CONSTRAINT uq_activation_email_code;
+    DROP INDEX IF EXISTS idx_activation_email, idx_activation_expires_at;
+    ALTER SEQUENCE activation_codes_id_seq OWNED BY NONE;
+
+    CREATE TABLE activation_codes (
+        id BIGINT NOT NULL DEFAULT nextval('activation_codes_id_seq'),
+        email TEXT NOT NULL,
+        code CHAR(4) NOT NULL,
+        expires_at TIMESTAMPTZ NOT NULL,
+        used_at TIMESTAMPTZ,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        CONSTRAINT activation_codes_pkey PRIMARY KEY (id, created_at),
+        CONSTRAINT uq_activation_email_code UNIQUE (email, code, created_at)
+    ) PARTITION BY RANGE (created_at);
+    ALTER SEQUENCE activation_codes_id_seq OWNED BY activation_codes.id;
+
+    CREATE INDEX idx_activation_email ON activation_codes (email, created_at);
+    CREATE INDEX idx_activation_expires_at ON activation_codes (expires_at);
+    CREATE TABLE activation_codes_default PARTITION OF activation_codes DEFAULT;
+
+    FOR day IN
+        SELECT generate_series(0, 7) + (NOW() AT TIME ZONE 'UTC')::date
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF activation_codes FOR VALUES FROM (%L) TO (%L)',
+            'activation_codes_p' || to_char(day, 'YYYYMMDD'),
+            day::timestamp AT TIME ZONE 'UTC',
+            (day + 1)::timestamp AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+
+    -- Codes from before today go to the default partition.
+    INSERT INTO activation_codes (id, email, code, expires_at, used_at, created_at)
+    SELECT id, email, code, expires_at, used_at, created_at FROM activation_codes_unpartitioned;
+    DROP TABLE activation_codes_unpartitioned;
+END
+$$;
@@ -2,29 +2,44 @@ from __future__ import annotations
 
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from scalar_fastapi import get_scalar_api_reference
 
 from app.api.main import api_router
 from app.core.database import close_pool, init_pool
 from app.core.redis import close_redis, init_redis
+from app.core.security import PasswordHasherBusy, close_password_hasher
+from app.services.email import start_email_publisher, stop_email_publisher
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_pool()
     await init_redis()
+    start_email_publisher()
     try:
         yield
     finally:
+        stop_email_publisher()
         await close_redis()
         await close_pool()
+        close_password_hasher()
+
+
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Service busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
 
 
 def create_app() -> FastAPI:
     """FastAPI application factory."""
     app = FastAPI(title="User Activation API", lifespan=lifespan, docs_url=None, redoc_url=None)
     app.include_router(api_router)
+    app.add_exception_handler(PasswordHasherBusy, password_hasher_busy_handler)
 
     scalar_ui = get_scalar_api_reference(
         openapi_url=app.openapi_url,
@@ -4,6 +4,8 @@ import string
 
 from pydantic import BaseModel, EmailStr, Field, field_validator
 
+_SPECIAL_CHARACTERS = frozenset(string.punctuation)
+
 
 class UserCreate(BaseModel):
     email: EmailStr
@@ -12,16 +14,22 @@ class UserCreate(BaseModel):
     @field_validator("password")
     @classmethod
     def validate_password(cls, value: str) -> str:
-        if value.strip() != value:
+        # Single pass over the password; the error raised for any input is unchanged.
+        if value and (value[0].isspace() or value[-1].isspace()):
             raise ValueError("Password cannot contain leading or trailing spaces")
 
-        if any(ch.isspace() for ch in value):
-            raise ValueError("Password cannot contain whitespace characters")
-
-        has_lower = any(ch.islower() for ch in value)
-        has_upper = any(ch.isupper() for ch in value)
-        has_digit = any(ch.isdigit() for ch in value)
-        has_special = any(ch in string.punctuation for ch in value)
+        has_lower = has_upper = has_digit = has_special = False
+        for ch in value:
+            if ch.islower():
+                has_lower = True
+            elif ch.isupper():
+                has_upper = True
+            elif ch.isdigit():
+                has_digit = True
+            elif ch in _SPECIAL_CHARACTERS:
+                has_special = True
+            elif ch.isspace():
+                raise ValueError("Password cannot contain whitespace characters")
 
         if not (has_lower and has_upper and has_digit and has_special):
             raise ValueError(
@@ -1,17 +1,80 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Sequence
 
+from psycopg import sql
 from psycopg.rows import dict_row
 
 from app.repositories.base import BaseRepository
 
+PARTITION_PREFIX = "activation_codes_p"
+# Slack on top of the TTL when bounding lookups by created_at, for clock skew
+# between the application and the database and for TTL changes.
+_ISSUE_WINDOW_MARGIN = timedelta(minutes=5)
+# Creating or detaching a partition locks ``activation_codes``; waiting longer
+# than this for the lock would queue every insert behind it.
+_PARTITION_LOCK_TIMEOUT = "SET LOCAL lock_timeout = '5s'"
+
+# CTEs that let UserRepository write users and their codes in one statement.
+# ISSUE_CODE_CTE stores %(code)s for the user returned by an ``inserted`` CTE;
+# ISSUE_CODES_CTE stores the ``code`` column of an ``input`` CTE for each user in
+# ``inserted``. Both bind %(expires_at)s, see code_expiry(). CONSUME_CODE_CTE marks
+# a valid %(code)s for %(email)s used and returns its id as ``consumed``; it binds
+# %(max_age)s, see max_code_age().
+ISSUE_CODE_CTE = (
+    "issued AS ("
+    "  INSERT INTO activation_codes (email, code, expires_at) "
+    "  SELECT %(email)s, %(code)s, %(expires_at)s FROM inserted"
+    ")"
+)
+ISSUE_CODES_CTE = (
+    "issued AS ("
+    "  INSERT INTO activation_codes (email, code, expires_at) "
+    "  SELECT input.email, input.code, %(expires_at)s FROM inserted JOIN input USING (email)"
+    ")"
+)
+CONSUME_CODE_CTE = (
+    "consumed AS ("
+    "  UPDATE activation_codes SET used_at = NOW() "
+    "  WHERE email = %(email)s AND code = %(code)s "
+    "    AND created_at > NOW() - %(max_age)s "
+    "    AND used_at IS NULL AND expires_at > NOW() "
+    "  RETURNING id"
+    ")"
+)
+
+
+def code_expiry(ttl_seconds: int) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+
+
+def max_code_age(ttl_seconds: int) -> timedelta:
+    """Age beyond which a code issued with ``ttl_seconds`` can no longer be valid.
+
+    Lookups bound ``created_at`` with it so that only the newest partitions of
+    ``activation_codes`` are scanned.
+    """
+    return timedelta(seconds=ttl_seconds) + _ISSUE_WINDOW_MARGIN
+
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
 
 class ActivationRepository(BaseRepository):
     """Data access for activation codes."""
 
+    # Codes share the database with users, so UserRepository can issue and consume
+    # them in its own statements using the CTEs above.
+    in_database = True
+
     async def create_code(self, email: str, code: str, ttl_seconds: int = 60) -> None:
-        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+        expires_at = code_expiry(ttl_seconds)
         query = (
             "INSERT INTO activation_codes (email, code, expires_at) "
             "VALUES (%(email)s, %(code)s, %(expires_at)s)"
@@ -25,34 +88,118 @@ class ActivationRepository(BaseRepository):
             },
         )
 
-    async def validate_code(self, email: str, code: str) -> bool:
+    async def create_codes(self, codes: Sequence[tuple[str, str]], ttl_seconds: int = 60) -> None:
+        """Insert one code per ``(email, code)`` pair in a single statement."""
+        if not codes:
+            return
+        expires_at = code_expiry(ttl_seconds)
         query = (
-            "UPDATE activation_codes "
-            "SET used_at = NOW() "
-            "WHERE email = %(email)s AND code = %(code)s "
-            "  AND used_at IS NULL AND expires_at > NOW() "
-            "RETURNING id"
+            "INSERT INTO activation_codes (email, code, expires_at) "
+            "SELECT email, code, %(expires_at)s "
+            "FROM UNNEST(%(emails)s::text[], %(codes)s::text[]) AS issued (email, code)"
         )
+        await self._execute(
+            query,
+            {
+                "emails": [email for email, _ in codes],
+                "codes": [code for _, code in codes],
+                "expires_at": expires_at,
+            },
+        )
+
+    async def validate_code(self, email: str, code: str, ttl_seconds: int = 60) -> bool:
+        query = f"WITH {CONSUME_CODE_CTE} SELECT id FROM consumed"
         record = await self._fetch_one(
             query,
-            {"email": email, "code": code},
+            {"email": email, "code": code, "max_age": max_code_age(ttl_seconds)},
             commit=True,
         )
         return record is not None
 
-    async def latest_code(self, email: str) -> dict | None:
+    async def latest_code(self, email: str, ttl_seconds: int = 60) -> dict | None:
+        """Return the newest code issued within the validity window, if any."""
         query = (
             "SELECT id, email, code, expires_at, used_at, created_at "
-            "FROM activation_codes WHERE email = %(email)s "
+            "FROM activation_codes "
+            "WHERE email = %(email)s AND created_at > NOW() - %(max_age)s "
             "ORDER BY created_at DESC LIMIT 1"
         )
         record = await self._fetch_one(
             query,
-            {"email": email},
+            {"email": email, "max_age": max_code_age(ttl_seconds)},
             row_factory=dict_row,
         )
         return record  # type: ignore[return-value]
 
-    async def purge_expired(self) -> int:
-        query = "DELETE FROM activation_codes WHERE expires_at <= NOW() AND used_at IS NULL"
-        return await self._execute(query)
+    async def purge_expired(self, *, expired_before: datetime, limit: int) -> int:
+        """Delete up to ``limit`` codes that expired before ``expired_before``.
+
+        Used codes are deleted too. The oldest rows are picked through
+        ``idx_activation_expires_at``, and rows locked by a concurrent purge are
+        skipped rather than waited on.
+        """
+        query = (
+            "DELETE FROM activation_codes WHERE id IN ("
+            "  SELECT id FROM activation_codes WHERE expires_at < %(expired_before)s "
+            "  ORDER BY expires_at LIMIT %(limit)s FOR UPDATE SKIP LOCKED"
+            ")"
+        )
+        return await self._execute(query, {"expired_before": expired_before, "limit": limit})
+
+    async def list_partitions(self) -> list[date]:
+        """Return the days that have a daily partition, oldest first."""
+        query = (
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'activation_codes'::regclass"
+        )
+        rows = await self._fetch_all(query)
+        days = [
+            datetime.strptime(name.removeprefix(PARTITION_PREFIX), "%Y%m%d").date()
+            for (name,) in rows
+            if name.startswith(PARTITION_PREFIX)
+        ]
+        return sorted(days)
+
+    async def create_partition(self, day: date) -> None:
+        """Create the partition for ``day`` (UTC).
+
+        Raises ``psycopg.errors.CheckViolation`` if the default partition
+        already holds rows for that day. Attaching locks ``activation_codes``,
+        so a long-running query makes this fail with ``LockNotAvailable``
+        instead of blocking inserts; the next run retries.
+        """
+        query = sql.SQL(
+            "CREATE TABLE IF NOT EXISTS {} PARTITION OF activation_codes "
+            "FOR VALUES FROM ({}) TO ({})"
+        ).format(
+            sql.Identifier(partition_name(day)),
+            sql.Literal(_day_start(day)),
+            sql.Literal(_day_start(day + timedelta(days=1))),
+        )
+        async with self.transaction():
+            await self._execute(_PARTITION_LOCK_TIMEOUT, prepare=False)
+            await self._execute(query, prepare=False)
+
+    async def drop_partition(self, day: date, *, expired_before: datetime) -> bool:
+        """Drop the partition for ``day`` unless a code in it expires after ``expired_before``.
+
+        Detaching takes an exclusive lock on ``activation_codes``; the lock timeout
+        keeps the drop from queueing inserts behind a long-running query.
+        """
+        name = sql.Identifier(partition_name(day))
+        async with self.transaction():
+            await self._execute(_PARTITION_LOCK_TIMEOUT, prepare=False)
+            live = await self._fetch_one(
+                sql.SQL("SELECT 1 FROM {} WHERE expires_at >= {} LIMIT 1").format(
+                    name, sql.Literal(expired_before)
+                ),
+                prepare=False,
+            )
+            if live is not None:
+                return False
+            await self._execute(
+                sql.SQL("ALTER TABLE activation_codes DETACH PARTITION {}").format(name),
+                prepare=False,
+            )
+            await self._execute(sql.SQL("DROP TABLE {}").format(name), prepare=False)
+        return True
@@ -2,41 +2,178 @@
 
 from __future__ import annotations
 
-from typing import Any, Mapping
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Mapping, Union
 
 from psycopg import AsyncConnection
+from psycopg.abc import Query
+from psycopg_pool import AsyncConnectionPool
+
+ConnectionSource = Union[AsyncConnection, AsyncConnectionPool]
+
+# The source, connection and after-commit callbacks of the unit of work currently
+# open in this context. Repositories built on the same source join it and defer
+# their commits to it.
+_UnitOfWork = tuple[ConnectionSource, AsyncConnection, list[Callable[[], None]]]
+_UNIT_OF_WORK: ContextVar[_UnitOfWork | None] = ContextVar("unit_of_work", default=None)
+
+
+def _prepare(connection: AsyncConnection, prepare: bool) -> bool | None:
+    # Repository queries are constant strings run over and over, so they are
+    # prepared on first use instead of after psycopg's default five executions.
+    # psycopg keeps the prepared statements per connection, keyed by query.
+    # A connection opened with prepare_threshold=None never prepares. One-off
+    # statements (DDL) pass prepare=False so they don't take a cache slot.
+    if not prepare:
+        return False
+    return True if connection.prepare_threshold is not None else None
 
 
 class BaseRepository:
-    def __init__(self, connection: AsyncConnection) -> None:
-        self._connection = connection
+    """Base class for repositories bound to a connection or a connection pool.
+
+    Bound to a pool, a repository checks a connection out only for the duration
+    of one statement, or of one :meth:`transaction` block, and returns it straight
+    away. Request handlers therefore don't hold a connection while they hash
+    passwords or talk to the broker, and the pool size no longer caps the number
+    of concurrent requests.
+
+    Statements are executed as server-side prepared statements unless the
+    connection was opened with ``prepare_threshold=None`` (see
+    ``DB_PREPARE_STATEMENTS``).
+    """
+
+    def __init__(self, source: ConnectionSource) -> None:
+        self._source = source
 
     @property
-    def connection(self) -> AsyncConnection:
-        return self._connection
+    def source(self) -> ConnectionSource:
+        return self._source
+
+    @property
+    def in_transaction(self) -> bool:
+        unit_of_work = _UNIT_OF_WORK.get()
+        return unit_of_work is not None and unit_of_work[0] is self._source
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """Run the enclosed statements as one unit of work with a single commit.
+
+        Every repository bound to the same connection or pool joins the unit of
+        work, so a service can group calls across repositories. Nested blocks join
+        the outer one; the commit (or rollback on error) happens when the
+        outermost exits. With a pool, the connection is held for the block only.
+        """
+        if self.in_transaction:
+            yield
+            return
+
+        callbacks: list[Callable[[], None]] = []
+        async with self._checkout() as connection:
+            token = _UNIT_OF_WORK.set((self._source, connection, callbacks))
+            try:
+                yield
+            except BaseException:
+                await connection.rollback()
+                raise
+            else:
+                await connection.commit()
+            finally:
+                _UNIT_OF_WORK.reset(token)
+        for callback in callbacks:
+            callback()
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` once the current unit of work has committed.
+
+        Outside a unit of work the statements have already committed, so it is
+        called straight away. It is dropped if the unit of work rolls back.
+        """
+        unit_of_work = _UNIT_OF_WORK.get()
+        if unit_of_work is not None and unit_of_work[0] is self._source:
+            unit_of_work[2].append(callback)
+        else:
+            callback()
+
+    @asynccontextmanager
+    async def pipeline(self) -> AsyncIterator[None]:
+        """Like :meth:`transaction`, with the statements sent in pipeline mode.
+
+        Statements whose results aren't read are queued and go out together with
+        the next one that is, or with the commit, so a unit of work costs one
+        round trip per result the caller waits on instead of one per statement.
+        Errors from queued statements surface at that point, and row counts of
+        queued statements aren't known until then.
+        """
+        async with self.transaction():
+            unit_of_work = _UNIT_OF_WORK.get()
+            assert unit_of_work is not None
+            async with unit_of_work[1].pipeline():
+                yield
+
+    @asynccontextmanager
+    async def _checkout(self) -> AsyncIterator[AsyncConnection]:
+        if isinstance(self._source, AsyncConnectionPool):
+            async with self._source.connection() as connection:
+                yield connection
+        else:
+            yield self._source
+
+    @asynccontextmanager
+    async def _connection(self, *, commit: bool) -> AsyncIterator[AsyncConnection]:
+        """Yield the connection for one statement.
+
+        Inside a unit of work that is the unit's connection, and committing is
+        left to it. Otherwise the statement runs on its own and is committed
+        afterwards if ``commit`` is set.
+        """
+        unit_of_work = _UNIT_OF_WORK.get()
+        if unit_of_work is not None and unit_of_work[0] is self._source:
+            yield unit_of_work[1]
+            return
+
+        async with self._checkout() as connection:
+            yield connection
+            if commit:
+                await connection.commit()
 
     async def _execute(
         self,
-        query: str,
+        query: Query,
         params: Mapping[str, Any] | None = None,
+        *,
+        prepare: bool = True,
     ) -> int:
-        async with self.connection.cursor() as cur:
-            await cur.execute(query, params)
-            affected = cur.rowcount
-        await self.connection.commit()
-        return affected
+        async with self._connection(commit=True) as connection:
+            async with connection.cursor() as cur:
+                await cur.execute(query, params, prepare=_prepare(connection, prepare))
+                return cur.rowcount
 
     async def _fetch_one(
         self,
-        query: str,
+        query: Query,
         params: Mapping[str, Any] | None = None,
         *,
         row_factory: Any | None = None,
         commit: bool = False,
+        prepare: bool = True,
     ) -> Any:
-        async with self.connection.cursor(row_factory=row_factory) as cur:
-            await cur.execute(query, params)
-            record = await cur.fetchone()
-        if commit:
-            await self.connection.commit()
-        return record
+        async with self._connection(commit=commit) as connection:
+            async with connection.cursor(row_factory=row_factory) as cur:
+                await cur.execute(query, params, prepare=_prepare(connection, prepare))
+                return await cur.fetchone()
+
+    async def _fetch_all(
+        self,
+        query: Query,
+        params: Mapping[str, Any] | None = None,
+        *,
+        row_factory: Any | None = None,
+        commit: bool = False,
+        prepare: bool = True,
+    ) -> list[Any]:
+        async with self._connection(commit=commit) as connection:
+            async with connection.cursor(row_factory=row_factory) as cur:
+                await cur.execute(query, params, prepare=_prepare(connection, prepare))
+                return await cur.fetchall()
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Any, Mapping, Sequence
+
+from psycopg.rows import dict_row
+
+from app.repositories.base import BaseRepository
+
+
+class OutboxRepository(BaseRepository):
+    """Data access for activation emails waiting to be published."""
+
+    async def enqueue(self, email: str, code: str, ttl_seconds: int) -> None:
+        query = (
+            "INSERT INTO email_outbox (email, code, ttl_seconds) "
+            "VALUES (%(email)s, %(code)s, %(ttl_seconds)s)"
+        )
+        await self._execute(query, {"email": email, "code": code, "ttl_seconds": ttl_seconds})
+
+    async def enqueue_many(self, messages: Sequence[Mapping[str, Any]]) -> None:
+        if not messages:
+            return
+        query = (
+            "INSERT INTO email_outbox (email, code, ttl_seconds) "
+            "SELECT * FROM UNNEST(%(emails)s::text[], %(codes)s::text[], %(ttls)s::int[])"
+        )
+        await self._execute(
+            query,
+            {
+                "emails": [message["email"] for message in messages],
+                "codes": [message["code"] for message in messages],
+                "ttls": [message["ttl_seconds"] for message in messages],
+            },
+        )
+
+    async def claim_batch(self, limit: int) -> list[dict[str, Any]]:
+        """Remove and return up to ``limit`` of the oldest messages.
+
+        Must run inside :meth:`transaction` so the rows come back if publishing
+        fails. Rows locked by a concurrent relay are skipped rather than waited on.
+        """
+        query = (
+            "DELETE FROM email_outbox WHERE id IN ("
+            "  SELECT id FROM email_outbox ORDER BY id "
+            "  LIMIT %(limit)s FOR UPDATE SKIP LOCKED"
+            ") RETURNING id, email, code, ttl_seconds"
+        )
+        rows = await self._fetch_all(query, {"limit": limit}, row_factory=dict_row)
+        return sorted(rows, key=lambda row: row["id"])
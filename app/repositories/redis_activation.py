@@ -0,0 +1,122 @@
+"""Activation codes kept in Redis instead of Postgres.
+
+Codes only live for ``activation_code_ttl_seconds``, so they don't need to be
+durable. Each code is its own key with a native TTL and is consumed with
+GETDEL, so a code can be used once even under concurrent requests. The newest
+code per email is kept under a second key for ``latest_code``, and a per-email
+counter numbers the codes like the ``id`` column of ``activation_codes``. All of
+an email's keys share a hash tag, so the scripts also work on Redis Cluster.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Sequence
+
+from redis.asyncio import Redis
+
+# KEYS: code, latest, id counter. ARGV: payload without id, ttl seconds.
+# The counter expires with the email's newest code, so ids are unique among the
+# codes that still exist. Returns the id.
+_CREATE_CODE = """
+local record = cjson.decode(ARGV[1])
+record['id'] = redis.call('INCR', KEYS[3])
+redis.call('EXPIRE', KEYS[3], ARGV[2])
+local payload = cjson.encode(record)
+redis.call('SET', KEYS[1], payload, 'EX', ARGV[2])
+redis.call('SET', KEYS[2], payload, 'EX', ARGV[2])
+return record['id']
+"""
+
+# KEYS: code, latest. ARGV: code, used_at. Returns the consumed payload or nil.
+_CONSUME_CODE = """
+local payload = redis.call('GETDEL', KEYS[1])
+if not payload then
+    return nil
+end
+local latest = redis.call('GET', KEYS[2])
+if latest then
+    local record = cjson.decode(latest)
+    if record['code'] == ARGV[1] then
+        record['used_at'] = ARGV[2]
+        redis.call('SET', KEYS[2], cjson.encode(record), 'KEEPTTL')
+    end
+end
+return payload
+"""
+
+
+class RedisActivationRepository:
+    """Drop-in replacement for ``ActivationRepository`` backed by Redis.
+
+    Building one registers its scripts, so callers keep one per Redis client.
+    """
+
+    # Codes can't be written in the same statement as users.
+    in_database = False
+
+    def __init__(self, redis: Redis) -> None:
+        self._redis = redis
+        self._create_code = redis.register_script(_CREATE_CODE)
+        self._consume_code = redis.register_script(_CONSUME_CODE)
+
+    async def create_code(self, email: str, code: str, ttl_seconds: int = 60) -> None:
+        await self._create_code(**self._create_code_call(email, code, ttl_seconds))
+
+    async def create_codes(self, codes: Sequence[tuple[str, str]], ttl_seconds: int = 60) -> None:
+        """Store one code per ``(email, code)`` pair in a single pipelined round trip."""
+        if not codes:
+            return
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for email, code in codes:
+                await self._create_code(
+                    **self._create_code_call(email, code, ttl_seconds), client=pipe
+                )
+            await pipe.execute()
+
+    async def validate_code(self, email: str, code: str, ttl_seconds: int = 60) -> bool:
+        """Consume the code if it exists; Redis has already dropped expired ones.
+
+        ``ttl_seconds`` is accepted for interface compatibility and not used.
+        """
+        consumed = await self._consume_code(
+            keys=[self._code_key(email, code), self._latest_key(email)],
+            args=[code, datetime.now(timezone.utc).isoformat()],
+        )
+        return consumed is not None
+
+    async def latest_code(self, email: str, ttl_seconds: int = 60) -> dict[str, Any] | None:
+        payload = await self._redis.get(self._latest_key(email))
+        if payload is None:
+            return None
+        record = json.loads(payload)
+        for field in ("created_at", "expires_at", "used_at"):
+            if record[field] is not None:
+                record[field] = datetime.fromisoformat(record[field])
+        return record
+
+    def _create_code_call(self, email: str, code: str, ttl_seconds: int) -> dict[str, Any]:
+        created_at = datetime.now(timezone.utc)
+        payload = {
+            "email": email,
+            "code": code,
+            "created_at": created_at.isoformat(),
+            "expires_at": (created_at + timedelta(seconds=ttl_seconds)).isoformat(),
+            "used_at": None,
+        }
+        return {
+            "keys": [self._code_key(email, code), self._latest_key(email), self._id_key(email)],
+            "args": [json.dumps(payload), ttl_seconds],
+        }
+
+    # Key helpers --------------------------------------------------------
+
+    def _code_key(self, email: str, code: str) -> str:
+        return f"activation:code:{{{email.lower()}}}:{code}"
+
+    def _latest_key(self, email: str) -> str:
+        return f"activation:code:{{{email.lower()}}}:latest"
+
+    def _id_key(self, email: str) -> str:
+        return f"activation:code:{{{email.lower()}}}:id"
@@ -1,27 +1,152 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Iterable, Sequence
 
 from psycopg.rows import dict_row
 
+from app.core.credential_cache import get_credential_cache
+from app.repositories.activation import (
+    CONSUME_CODE_CTE,
+    ISSUE_CODE_CTE,
+    ISSUE_CODES_CTE,
+    code_expiry,
+    max_code_age,
+)
 from app.repositories.base import BaseRepository
 
+_INSERT_USER_CTE = (
+    "inserted AS ("
+    "  INSERT INTO users (email, password_hash) "
+    "  VALUES (%(email)s, %(password_hash)s) "
+    "  ON CONFLICT (email) DO NOTHING RETURNING id"
+    ")"
+)
+_SELECT_USER = (
+    "SELECT id, TRUE AS created, FALSE AS is_active FROM inserted "
+    "UNION ALL "
+    "SELECT id, FALSE AS created, is_active FROM users "
+    "WHERE email = %(email)s AND NOT EXISTS (SELECT 1 FROM inserted)"
+)
+_REGISTER_USER = f"WITH {_INSERT_USER_CTE} {_SELECT_USER}"
+_REGISTER_USER_WITH_CODE = f"WITH {_INSERT_USER_CTE}, {ISSUE_CODE_CTE} {_SELECT_USER}"
+
+_INSERT_USERS_CTE = (
+    "inserted AS ("
+    "  INSERT INTO users (email, password_hash) "
+    "  SELECT email, password_hash FROM input ORDER BY email "
+    "  ON CONFLICT (email) DO NOTHING RETURNING id, email"
+    ")"
+)
+_SELECT_USERS = (
+    "SELECT id, email, TRUE AS created, FALSE AS is_active FROM inserted "
+    "UNION ALL "
+    "SELECT users.id, users.email, FALSE AS created, users.is_active "
+    "FROM users JOIN input USING (email) "
+    "WHERE NOT EXISTS (SELECT 1 FROM inserted WHERE inserted.email = users.email)"
+)
+_REGISTER_USERS = (
+    "WITH input AS ("
+    "  SELECT * FROM UNNEST(%(emails)s::text[], %(password_hashes)s::text[]) "
+    "    AS input (email, password_hash)"
+    f"), {_INSERT_USERS_CTE} {_SELECT_USERS}"
+)
+_REGISTER_USERS_WITH_CODES = (
+    "WITH input AS ("
+    "  SELECT * FROM UNNEST("
+    "    %(emails)s::text[], %(password_hashes)s::text[], %(codes)s::text[]"
+    "  ) "
+    "    AS input (email, password_hash, code)"
+    f"), {_INSERT_USERS_CTE}, {ISSUE_CODES_CTE} {_SELECT_USERS}"
+)
+
+_ACTIVATE_WITH_CODE = (
+    f"WITH {CONSUME_CODE_CTE} "
+    "UPDATE users SET is_active = TRUE "
+    "WHERE email = %(email)s AND EXISTS (SELECT 1 FROM consumed) "
+    "RETURNING id"
+)
+
 
 class UserRepository(BaseRepository):
     """Data access for user records."""
 
-    async def create_user(self, email: str, password_hash: str) -> int:
-        query = (
-            "INSERT INTO users (email, password_hash) "
-            "VALUES (%(email)s, %(password_hash)s) RETURNING id"
-        )
-        record = await self._fetch_one(
-            query,
-            {"email": email, "password_hash": password_hash},
-            row_factory=dict_row,
-            commit=True,
-        )
-        return int(record["id"])  # type: ignore[index]
+    async def register_user(
+        self, email: str, password_hash: str, *, code: str | None = None, ttl_seconds: int = 60
+    ) -> dict[str, Any] | None:
+        """Create a pending user unless the email is already registered.
+
+        With ``code``, the user's first activation code is inserted by the same
+        statement, for codes kept in Postgres. Returns ``id``, ``created`` and
+        ``is_active`` for the new or already existing user. ``None`` means a
+        concurrent registration for the same email has just committed and is not
+        visible to this statement yet.
+        """
+        params: dict[str, Any] = {"email": email, "password_hash": password_hash}
+        query = _REGISTER_USER
+        if code is not None:
+            query = _REGISTER_USER_WITH_CODE
+            params.update(code=code, expires_at=code_expiry(ttl_seconds))
+        record = await self._fetch_one(query, params, row_factory=dict_row, commit=True)
+        return record  # type: ignore[return-value]
+
+    async def register_users(
+        self,
+        users: Sequence[tuple[str, str]],
+        *,
+        codes: Sequence[str] | None = None,
+        ttl_seconds: int = 60,
+    ) -> list[dict[str, Any]]:
+        """Multi-row :meth:`register_user` for ``(email, password_hash)`` pairs.
+
+        Emails must be unique within ``users``; ``codes`` are matched by position.
+        Returns ``id``, ``email``, ``created`` and ``is_active`` per user; an email
+        is missing when a concurrent registration for it has just committed. Rows
+        are inserted in email order so concurrent batches can't deadlock.
+        """
+        params: dict[str, Any] = {
+            "emails": [email for email, _ in users],
+            "password_hashes": [password_hash for _, password_hash in users],
+        }
+        query = _REGISTER_USERS
+        if codes is not None:
+            query = _REGISTER_USERS_WITH_CODES
+            params.update(codes=list(codes), expires_at=code_expiry(ttl_seconds))
+        return await self._fetch_all(query, params, row_factory=dict_row, commit=True)
+
+    async def import_users(
+        self, rows: Iterable[tuple[int, str, str, bool]]
+    ) -> list[dict[str, Any]]:
+        """Insert pre-hashed users, skipping emails that already exist.
+
+        ``rows`` are ``(line, email, password_hash, is_active)``. They are streamed
+        into a temporary staging table with ``COPY FROM STDIN`` and moved to
+        ``users`` with one ``INSERT ... ON CONFLICT DO NOTHING``; for an email
+        repeated within ``rows`` the lowest ``line`` wins. Returns ``email`` and
+        ``is_active`` of the users actually inserted.
+        """
+        async with self._connection(commit=True) as connection:
+            async with connection.cursor(row_factory=dict_row) as cur:
+                await cur.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS users_import ("
+                    "  line BIGINT NOT NULL, email TEXT NOT NULL, "
+                    "  password_hash TEXT NOT NULL, is_active BOOLEAN NOT NULL"
+                    ") ON COMMIT DELETE ROWS",
+                    prepare=False,
+                )
+                await cur.execute("TRUNCATE users_import", prepare=False)
+                async with cur.copy(
+                    "COPY users_import (line, email, password_hash, is_active) FROM STDIN"
+                ) as copy:
+                    for row in rows:
+                        await copy.write_row(row)
+                await cur.execute(
+                    "INSERT INTO users (email, password_hash, is_active) "
+                    "SELECT DISTINCT ON (email) email, password_hash, is_active "
+                    "FROM users_import ORDER BY email, line "
+                    "ON CONFLICT (email) DO NOTHING "
+                    "RETURNING email, is_active"
+                )
+                return await cur.fetchall()
 
     async def get_user_by_email(self, email: str) -> dict[str, Any] | None:
         query = (
@@ -38,3 +163,24 @@ class UserRepository(BaseRepository):
     async def activate_user(self, email: str) -> None:
         query = "UPDATE users SET is_active = TRUE WHERE email = %(email)s"
         await self._execute(query, {"email": email})
+        self._invalidate_credentials(email)
+
+    async def activate_with_code(self, email: str, code: str, ttl_seconds: int = 60) -> bool:
+        """Consume a valid activation code kept in Postgres and activate its user.
+
+        One statement; returns whether the code was valid.
+        """
+        record = await self._fetch_one(
+            _ACTIVATE_WITH_CODE,
+            {"email": email, "code": code, "max_age": max_code_age(ttl_seconds)},
+            commit=True,
+        )
+        if record is None:
+            return False
+        self._invalidate_credentials(email)
+        return True
+
+    def _invalidate_credentials(self, email: str) -> None:
+        # Only once committed, or a concurrent Basic Auth check could cache the
+        # still inactive row again in between.
+        self.after_commit(lambda: get_credential_cache().invalidate(email))
@@ -0,0 +1,143 @@
+"""Compare Redis latency of the scripted rate limiter against per-command round trips.
+
+Usage: python -m app.scripts.bench_rate_limiter [--iterations N] [--redis-url URL]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable
+
+import redis.asyncio as redis
+
+from app.core import constants
+from app.services.rate_limiter import RateLimiter, RateLimitExceeded
+
+
+class _CommandPerStepLimiter(RateLimiter):
+    """Previous implementation: one awaited Redis command per step."""
+
+    async def record_activation_failure(self, email: str) -> None:
+        attempts_key = self._activation_attempts_key(email)
+        attempts = await self._redis.incr(attempts_key)
+        if attempts == 1:
+            await self._redis.expire(attempts_key, constants.ACTIVATION_ATTEMPT_WINDOW_SECONDS)
+        if attempts >= constants.ACTIVATION_ATTEMPT_LIMIT:
+            await self._redis.set(
+                self._activation_lock_key(email), "1", ex=constants.ACTIVATION_LOCK_SECONDS
+            )
+            await self._redis.delete(attempts_key)
+
+    async def reset_activation(self, email: str) -> None:
+        await self._redis.delete(self._activation_attempts_key(email))
+        await self._redis.delete(self._activation_lock_key(email))
+
+    async def ensure_resend_allowed(self, email: str) -> None:
+        minute_ttl = await self._redis.ttl(self._resend_minute_key(email))
+        if constants.RESEND_PER_MINUTE_LIMIT > 0 and minute_ttl and minute_ttl > 0:
+            raise RateLimitExceeded("minute", retry_after=minute_ttl)
+        daily_count = await self._redis.get(self._resend_daily_key(email))
+        if daily_count is not None and int(daily_count) >= constants.RESEND_DAILY_LIMIT:
+            ttl = await self._redis.ttl(self._resend_daily_key(email))
+            raise RateLimitExceeded("daily", retry_after=ttl)
+
+    async def record_resend(self, email: str) -> None:
+        if constants.RESEND_PER_MINUTE_LIMIT > 0:
+            await self._redis.set(
+                self._resend_minute_key(email), "1", ex=constants.RESEND_MINUTE_WINDOW_SECONDS
+            )
+        daily_key = self._resend_daily_key(email)
+        total = await self._redis.incr(daily_key)
+        if total == 1:
+            await self._redis.expire(daily_key, constants.RESEND_DAILY_WINDOW_SECONDS)
+
+
+async def _resend_flow(limiter: RateLimiter, email: str) -> None:
+    try:
+        await limiter.ensure_resend_allowed(email)
+    except RateLimitExceeded:
+        return
+    await limiter.record_resend(email)
+
+
+async def _failed_activation_flow(limiter: RateLimiter, email: str) -> None:
+    try:
+        await limiter.ensure_activation_allowed(email)
+    except RateLimitExceeded:
+        await limiter.reset_activation(email)
+        return
+    await limiter.record_activation_failure(email)
+
+
+_EMAILS = [f"bench-{index}@example.com" for index in range(50)]
+
+
+async def _cleanup(client: redis.Redis, limiter: RateLimiter) -> None:
+    keys = []
+    for email in _EMAILS:
+        keys += [
+            limiter._activation_attempts_key(email),
+            limiter._activation_lock_key(email),
+            limiter._resend_minute_key(email),
+            limiter._resend_daily_key(email),
+        ]
+    await client.delete(*keys)
+
+
+async def _measure(
+    client: redis.Redis,
+    limiter: RateLimiter,
+    flow: Callable[[RateLimiter, str], Awaitable[None]],
+    iterations: int,
+) -> list[float]:
+    samples: list[float] = []
+    for index in range(iterations):
+        email = _EMAILS[index % len(_EMAILS)]
+        started = time.perf_counter()
+        await flow(limiter, email)
+        samples.append((time.perf_counter() - started) * 1000)
+    await _cleanup(client, limiter)
+    return samples
+
+
+def _summary(samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p50 = ordered[len(ordered) // 2]
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"mean={statistics.fmean(samples):.3f}ms p50={p50:.3f}ms p99={p99:.3f}ms"
+
+
+async def _run(redis_url: str, iterations: int) -> None:
+    client = redis.from_url(redis_url, decode_responses=True)
+    try:
+        for label, flow in (("resend", _resend_flow), ("activation", _failed_activation_flow)):
+            for name, limiter in (
+                ("per-command", _CommandPerStepLimiter(client)),
+                ("scripted", RateLimiter(client)),
+            ):
+                samples = await _measure(client, limiter, flow, iterations)
+                print(f"{label:<10} {name:<12} {_summary(samples)}")
+    finally:
+        await client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--redis-url", default=None, help="defaults to REDIS_URL from settings")
+    args = parser.parse_args()
+
+    redis_url = args.redis_url
+    if redis_url is None:
+        from app.core.config import get_settings
+
+        redis_url = get_settings().redis_url
+
+    asyncio.run(_run(redis_url, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Import users with existing bcrypt hashes from a legacy export.
+
+Usage: python -m app.scripts.import_users FILE [--format csv|ndjson]
+       [--batch-size N] [--issue-codes] [--code-ttl-seconds S]
+
+FILE (``-`` for stdin) holds ``email``, ``password_hash`` and optionally
+``is_active`` per record, either as CSV with a header row or as one JSON object
+per line. Hashes are stored as they are, so nothing is re-hashed. Each batch is
+streamed into Postgres with ``COPY`` and inserted with ``ON CONFLICT DO
+NOTHING``. Emails that already exist, in the table or earlier in the file, are
+skipped, so an interrupted import can simply be run again. With
+``--issue-codes`` every imported inactive user gets an activation code and
+email.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import re
+import sys
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, TextIO
+
+from psycopg import AsyncConnection
+
+from app.core.config import get_settings
+from app.core.database import connection_options
+from app.core.redis import close_redis, get_redis_client
+from app.repositories.activation import ActivationRepository
+from app.repositories.redis_activation import RedisActivationRepository
+from app.repositories.user import UserRepository
+from app.tasks.email import publish_activation_emails
+from app.utils.code_generator import generate_code
+
+_LOGGER = logging.getLogger(__name__)
+_BCRYPT_HASH = re.compile(r"^\$2[abxy]?\$\d{2}\$[./A-Za-z0-9]{53}$")
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_TRUE = frozenset({"1", "true", "t", "yes", "y"})
+_FALSE = frozenset({"", "0", "false", "f", "no", "n"})
+_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+_MAX_REPORTED_REJECTS = 20
+
+ImportRow = tuple[int, str, str, bool]
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    inserted: int = 0
+    skipped: int = 0
+    rejected: int = 0
+    codes_issued: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self.started
+        rate = self.read / elapsed if elapsed else 0.0
+        return (
+            f"read {self.read} inserted {self.inserted} skipped {self.skipped} "
+            f"rejected {self.rejected} codes {self.codes_issued} "
+            f"in {elapsed:.1f}s ({rate:,.0f} rows/s)"
+        )
+
+
+def _parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower() if value is not None else ""
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise InvalidRecord(f"is_active must be a boolean, got {value!r}")
+
+
+def parse_record(line: int, record: Any) -> ImportRow:
+    """Validate one input record and return it as a staging row."""
+    if not isinstance(record, dict):
+        raise InvalidRecord("record is not an object")
+    email = str(record.get("email") or "").strip()
+    if not _EMAIL.match(email):
+        raise InvalidRecord(f"invalid email {email!r}")
+    password_hash = str(record.get("password_hash") or "").strip()
+    if not _BCRYPT_HASH.match(password_hash):
+        raise InvalidRecord("password_hash is not a bcrypt hash")
+    return line, email, password_hash, _parse_bool(record.get("is_active"))
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[tuple[int, Any]]:
+    """Yield ``(line, record)`` pairs; unparsable NDJSON lines yield ``None``."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            yield line, json.loads(text)
+        except json.JSONDecodeError:
+            yield line, None
+
+
+def batches(
+    records: Iterable[tuple[int, Any]], batch_size: int, stats: ImportStats
+) -> Iterator[list[ImportRow]]:
+    """Group valid records into batches, counting and logging rejected ones."""
+    batch: list[ImportRow] = []
+    for line, record in records:
+        stats.read += 1
+        try:
+            batch.append(parse_record(line, record))
+        except InvalidRecord as exc:
+            stats.rejected += 1
+            if stats.rejected <= _MAX_REPORTED_REJECTS:
+                _LOGGER.warning("Rejected line %s: %s", line, exc)
+            continue
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def import_batch(
+    users: UserRepository,
+    codes: ActivationRepository | RedisActivationRepository,
+    rows: list[ImportRow],
+    *,
+    code_ttl_seconds: int | None,
+) -> tuple[int, list[dict[str, Any]]]:
+    """Import one batch in one transaction.
+
+    Returns the number of users inserted and, when ``code_ttl_seconds`` is set,
+    the activation emails to publish once the batch is committed.
+    """
+    async with users.transaction():
+        inserted = await users.import_users(rows)
+        if code_ttl_seconds is None:
+            return len(inserted), []
+        issued = [(row["email"], generate_code()) for row in inserted if not row["is_active"]]
+        await codes.create_codes(issued, ttl_seconds=code_ttl_seconds)
+    messages = [
+        {"email": email, "code": code, "ttl_seconds": code_ttl_seconds} for email, code in issued
+    ]
+    return len(inserted), messages
+
+
+def _detect_format(path: str, fmt: str | None) -> str:
+    if fmt:
+        return fmt
+    for suffix, detected in _FORMATS.items():
+        if path.lower().endswith(suffix):
+            return detected
+    raise SystemExit("Cannot tell the input format from the file name; pass --format")
+
+
+async def _run(args: argparse.Namespace) -> ImportStats:
+    settings = get_settings()
+    fmt = _detect_format(args.file, args.format)
+    code_ttl_seconds = None
+    if args.issue_codes:
+        code_ttl_seconds = args.code_ttl_seconds or settings.activation_code_ttl_seconds
+    stats = ImportStats()
+
+    stream = (
+        nullcontext(sys.stdin)
+        if args.file == "-"
+        else open(args.file, encoding="utf-8", newline="")
+    )
+    with stream as handle:
+        async with await AsyncConnection.connect(
+            settings.database_url, **connection_options()
+        ) as connection:
+            users = UserRepository(connection)
+            codes: ActivationRepository | RedisActivationRepository
+            if settings.activation_code_store == "redis":
+                codes = RedisActivationRepository(get_redis_client())
+            else:
+                codes = ActivationRepository(connection)
+            try:
+                for batch in batches(read_records(handle, fmt), args.batch_size, stats):
+                    inserted, messages = await import_batch(
+                        users, codes, batch, code_ttl_seconds=code_ttl_seconds
+                    )
+                    if messages:
+                        await asyncio.to_thread(publish_activation_emails, messages)
+                    stats.inserted += inserted
+                    stats.skipped += len(batch) - inserted
+                    stats.codes_issued += len(messages)
+                    print(stats.summary(), flush=True)
+            finally:
+                if settings.activation_code_store == "redis":
+                    await close_redis()
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("file", help="CSV or NDJSON export, or - for stdin")
+    parser.add_argument("--format", choices=("csv", "ndjson"))
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument(
+        "--issue-codes",
+        action="store_true",
+        help="issue an activation code and email to every imported inactive user",
+    )
+    parser.add_argument(
+        "--code-ttl-seconds",
+        type=int,
+        help="lifetime of issued codes (defaults to ACTIVATION_CODE_TTL_SECONDS)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    stats = asyncio.run(_run(args))
+    print(f"Done: {stats.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""Load test the register -> resend -> activate flow against a running stack.
+
+Usage: python -m app.scripts.loadtest [--base-url URL] [--mock-email-url URL]
+       [--rate R] [--concurrency N] [--duration S] [--resend-ratio P]
+       [--activate-ratio P] [--invalid-code-ratio P] [--output FILE]
+
+Each simulated user registers, optionally asks for a new code, then activates
+with the code read back from the mock email server's inbox. With ``--rate``
+users arrive as a Poisson process (open loop) and at most ``--concurrency`` are
+in flight; with ``--rate 0`` that many users loop back to back (closed loop).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Any
+
+import httpx
+
+_CODE_PATTERN = re.compile(r"^\s+(\d{4})\s*$", re.MULTILINE)
+_PASSWORD = "Loadtest1!"
+
+
+def _percentile(ordered: list[float], fraction: float) -> float | None:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def extract_activation_code(body: str) -> str | None:
+    match = _CODE_PATTERN.search(body or "")
+    return match.group(1) if match else None
+
+
+class Recorder:
+    """Collects per-route latencies and outcomes for the final report."""
+
+    def __init__(self) -> None:
+        self._durations: dict[str, list[float]] = defaultdict(list)
+        self._outcomes: dict[str, Counter[str]] = defaultdict(Counter)
+        self.started = time.monotonic()
+        self.finished: float | None = None
+
+    def record(self, route: str, outcome: int | str, seconds: float) -> None:
+        self._durations[route].append(seconds)
+        self._outcomes[route][str(outcome)] += 1
+
+    def stop(self) -> None:
+        self.finished = time.monotonic()
+
+    def report(self) -> dict[str, Any]:
+        elapsed = (self.finished or time.monotonic()) - self.started
+        routes: dict[str, Any] = {}
+        for route in sorted(self._durations):
+            ordered = sorted(self._durations[route])
+            outcomes = self._outcomes[route]
+            errors = {
+                outcome: count
+                for outcome, count in outcomes.items()
+                if not (outcome.isdigit() and int(outcome) < 400) and outcome != "delivered"
+            }
+            routes[route] = {
+                "count": len(ordered),
+                "requests_per_second": round(len(ordered) / elapsed, 3) if elapsed else 0.0,
+                "latency_ms": {
+                    name: round(value * 1000, 3) if value is not None else None
+                    for name, value in (
+                        ("p50", _percentile(ordered, 0.5)),
+                        ("p95", _percentile(ordered, 0.95)),
+                        ("p99", _percentile(ordered, 0.99)),
+                        ("max", ordered[-1] if ordered else None),
+                    )
+                },
+                "outcomes": dict(sorted(outcomes.items())),
+                "errors": sum(errors.values()),
+                "rate_limited": outcomes.get("429", 0),
+            }
+        return {"elapsed_seconds": round(elapsed, 3), "routes": routes}
+
+
+class LoadTest:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        mock_client: httpx.AsyncClient,
+        recorder: Recorder,
+        args: argparse.Namespace,
+    ) -> None:
+        self._client = client
+        self._mock = mock_client
+        self._recorder = recorder
+        self._args = args
+        self._run_id = uuid.uuid4().hex[:8]
+        self.users = 0
+
+    async def _request(
+        self, route: str, path: str, *, token: str | None = None, json_body: Any = None
+    ) -> httpx.Response | None:
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        started = time.perf_counter()
+        try:
+            response = await self._client.post(path, json=json_body, headers=headers)
+        except httpx.HTTPError as exc:
+            self._recorder.record(route, type(exc).__name__, time.perf_counter() - started)
+            return None
+        self._recorder.record(route, response.status_code, time.perf_counter() - started)
+        return response
+
+    async def _wait_for_code(self, email: str, expected_messages: int) -> str | None:
+        """Poll the mock inbox until the expected number of emails has arrived."""
+        started = time.perf_counter()
+        deadline = started + self._args.code_timeout
+        while time.perf_counter() < deadline:
+            try:
+                response = await self._mock.get(f"/inbox/{email}")
+            except httpx.HTTPError:
+                response = None
+            if response is not None and response.status_code == 200:
+                message = response.json()
+                if message["count"] >= expected_messages:
+                    self._recorder.record("email", "delivered", time.perf_counter() - started)
+                    return extract_activation_code(message["body"])
+            await asyncio.sleep(0.05)
+        self._recorder.record("email", "timeout", time.perf_counter() - started)
+        return None
+
+    async def user_journey(self) -> None:
+        self.users += 1
+        email = f"loadtest-{self._run_id}-{self.users}@example.com"
+        response = await self._request(
+            "/auth/register", "/auth/register", json_body={"email": email, "password": _PASSWORD}
+        )
+        if response is None or response.status_code != 201:
+            return
+        token = response.json()["token"]
+        expected_messages = 1
+
+        if random.random() < self._args.resend_ratio:
+            response = await self._request("/auth/resend", "/auth/resend", token=token)
+            if response is not None and response.status_code == 202:
+                expected_messages += 1
+
+        if random.random() >= self._args.activate_ratio:
+            return
+        if random.random() < self._args.invalid_code_ratio:
+            code = "0000"
+        else:
+            code = await self._wait_for_code(email, expected_messages)
+            if code is None:
+                return
+        await self._request(
+            "/auth/activate", "/auth/activate", token=token, json_body={"code": code}
+        )
+
+    async def run(self) -> None:
+        deadline = time.monotonic() + self._args.duration
+        if self._args.rate > 0:
+            await self._open_loop(deadline)
+        else:
+            await asyncio.gather(
+                *(self._closed_loop(deadline) for _ in range(self._args.concurrency))
+            )
+
+    async def _closed_loop(self, deadline: float) -> None:
+        while time.monotonic() < deadline:
+            await self.user_journey()
+
+    async def _open_loop(self, deadline: float) -> None:
+        slots = asyncio.Semaphore(self._args.concurrency)
+        tasks: set[asyncio.Task[None]] = set()
+
+        async def journey() -> None:
+            async with slots:
+                await self.user_journey()
+
+        while time.monotonic() < deadline:
+            task = asyncio.create_task(journey())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            await asyncio.sleep(random.expovariate(self._args.rate))
+        if tasks:
+            await asyncio.gather(*tasks)
+
+
+async def _mock_stats(mock_client: httpx.AsyncClient, method: str) -> dict[str, Any] | None:
+    try:
+        response = await mock_client.request(method, "/stats")
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return None
+    return response.json()
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    print(f"elapsed {report['elapsed_seconds']:.1f}s, {report['users']} users")
+    print(f"{'route':<16}{'count':>8}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}  outcomes")
+    for route, stats in report["routes"].items():
+        latency = stats["latency_ms"]
+        outcomes = " ".join(f"{name}={count}" for name, count in stats["outcomes"].items())
+        print(
+            f"{route:<16}{stats['count']:>8}{stats['requests_per_second']:>10.1f}"
+            f"{latency['p50']:>10.1f}{latency['p95']:>10.1f}{latency['p99']:>10.1f}  {outcomes}"
+        )
+
+
+async def _run(args: argparse.Namespace) -> dict[str, Any]:
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+    async with (
+        httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client,
+        httpx.AsyncClient(base_url=args.mock_email_url, limits=limits, timeout=5) as mock_client,
+    ):
+        await _mock_stats(mock_client, "DELETE")
+        recorder = Recorder()
+        load_test = LoadTest(client, mock_client, recorder, args)
+        await load_test.run()
+        recorder.stop()
+        report = recorder.report()
+        report["users"] = load_test.users
+        report["config"] = {
+            name: getattr(args, name)
+            for name in (
+                "rate",
+                "concurrency",
+                "duration",
+                "resend_ratio",
+                "activate_ratio",
+                "invalid_code_ratio",
+            )
+        }
+        report["mock_email"] = await _mock_stats(mock_client, "GET")
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--mock-email-url", default="http://localhost:8080")
+    parser.add_argument(
+        "--rate", type=float, default=20.0, help="users per second; 0 runs a closed loop"
+    )
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--resend-ratio", type=float, default=0.2)
+    parser.add_argument("--activate-ratio", type=float, default=0.9)
+    parser.add_argument("--invalid-code-ratio", type=float, default=0.05)
+    parser.add_argument("--code-timeout", type=float, default=10.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(_run(args))
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Relay activation emails from the email_outbox table to the Celery broker.
+
+Usage: python -m app.scripts.outbox_relay [--batch-size N] [--poll-seconds S] [--once]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+
+from psycopg import AsyncConnection, OperationalError
+
+from app.core.config import get_settings
+from app.core.database import connection_options
+from app.repositories.outbox import OutboxRepository
+from app.tasks.email import publish_activation_emails
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def relay_batch(outbox: OutboxRepository, batch_size: int) -> int:
+    """Publish one batch; the rows are only deleted if publishing succeeds."""
+    async with outbox.transaction():
+        messages = await outbox.claim_batch(batch_size)
+        if not messages:
+            return 0
+        return await asyncio.to_thread(publish_activation_emails, messages)
+
+
+async def _run(batch_size: int, poll_seconds: float, once: bool) -> None:
+    settings = get_settings()
+    async with await AsyncConnection.connect(
+        settings.database_url, **connection_options()
+    ) as connection:
+        outbox = OutboxRepository(connection)
+        while True:
+            try:
+                published = await relay_batch(outbox, batch_size)
+            except OperationalError:
+                # Lost the database connection; exit and let the supervisor restart us.
+                raise
+            except Exception:  # noqa: BLE001
+                _LOGGER.exception("Outbox relay batch failed, will retry")
+                published = 0
+            if published:
+                _LOGGER.info("Published %s activation emails", published)
+            if once:
+                return
+            if published < batch_size:
+                await asyncio.sleep(poll_seconds)
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=settings.email_outbox_batch_size)
+    parser.add_argument("--poll-seconds", type=float, default=settings.email_outbox_poll_seconds)
+    parser.add_argument("--once", action="store_true", help="relay a single batch and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run(args.batch_size, args.poll_seconds, args.once))
+
+
+if __name__ == "__main__":
+    main()
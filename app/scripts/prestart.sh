@@ -1,4 +1,4 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-python scripts/run_migrations.py
+python -m app.scripts.run_migrations
@@ -1,30 +1,140 @@
-"""Apply SQL migrations in app/db/migrations against the configured database."""
+"""Apply SQL migrations in app/db/migrations against the configured database.
+
+Applied files are recorded in ``schema_migrations`` with a checksum of their
+contents and skipped on later runs; editing a file after it was applied is an
+error. Runners take a Postgres advisory lock first, so when several replicas
+start at once one applies the migrations and the others wait, then find
+nothing left to do.
+
+Each file runs in its own transaction together with its ledger row. A file
+whose first line is ``-- migrate:no-transaction`` runs in autocommit instead,
+one statement at a time, for statements such as ``CREATE INDEX CONCURRENTLY``
+that can't run inside a transaction block. Such files are split on semicolons
+that end a line, so they can't hold function bodies, and their statements
+should be safe to re-run in case the runner stops halfway. A failed
+``CREATE INDEX CONCURRENTLY`` leaves an invalid index behind, so precede it
+with ``DROP INDEX CONCURRENTLY IF EXISTS``.
+"""
 
 from __future__ import annotations
 
 import asyncio
+import hashlib
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable
 
 from psycopg import AsyncConnection
 
 from app.core.config import get_settings
+from app.core.database import connection_options
 
 MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "db" / "migrations"
-
-
-def _load_migrations() -> Iterable[Path]:
+NO_TRANSACTION = "-- migrate:no-transaction"
+
+# Key for pg_advisory_lock; any constant works as long as every runner uses it.
+_LOCK_KEY = 0x6D696772617465  # "migrate"
+
+_CREATE_LEDGER = (
+    "CREATE TABLE IF NOT EXISTS schema_migrations ("
+    "  filename TEXT PRIMARY KEY,"
+    "  checksum TEXT NOT NULL,"
+    "  applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()"
+    ")"
+)
+
+
+class MigrationError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Migration:
+    name: str
+    sql: str
+
+    @classmethod
+    def from_path(cls, path: Path) -> Migration:
+        return cls(path.name, path.read_text(encoding="utf-8"))
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+    @property
+    def transactional(self) -> bool:
+        first_line = next((line for line in self.sql.splitlines() if line.strip()), "")
+        return first_line.strip() != NO_TRANSACTION
+
+    def statements(self) -> list[str]:
+        """Split the file on semicolons at the end of a line, dropping comment-only parts."""
+        statements: list[str] = []
+        current: list[str] = []
+        for line in [*self.sql.splitlines(), ";"]:
+            current.append(line)
+            if not line.rstrip().endswith(";"):
+                continue
+            statement = "\n".join(current).strip().rstrip(";").strip()
+            current = []
+            lines = [part.strip() for part in statement.splitlines()]
+            if any(part and not part.startswith("--") for part in lines):
+                statements.append(statement)
+        return statements
+
+
+def _load_migrations() -> Iterable[Migration]:
     if not MIGRATIONS_DIR.exists():
         return []
-    return sorted(MIGRATIONS_DIR.glob("*.sql"))
+    return [Migration.from_path(path) for path in sorted(MIGRATIONS_DIR.glob("*.sql"))]
 
 
-async def _apply_migration(connection: AsyncConnection, path: Path) -> None:
-    sql = path.read_text(encoding="utf-8").strip()
-    if not sql:
+async def _apply_migration(connection: AsyncConnection, migration: Migration) -> None:
+    print(f"Applying {migration.name}...")
+    record = "INSERT INTO schema_migrations (filename, checksum) VALUES (%s, %s)"
+    if migration.transactional:
+        async with connection.transaction():
+            if migration.sql.strip():
+                await connection.execute(migration.sql)
+            await connection.execute(record, (migration.name, migration.checksum))
         return
-    print(f"Applying {path.name}...")
-    await connection.execute(sql)
+    for statement in migration.statements():
+        await connection.execute(statement)
+    await connection.execute(record, (migration.name, migration.checksum))
+
+
+async def apply_migrations(
+    connection: AsyncConnection, migrations: Iterable[Migration] | None = None
+) -> list[str]:
+    """Apply the migrations not yet in the ledger and return their names.
+
+    ``connection`` is switched to autocommit; it must not be in a transaction.
+    """
+    migrations = list(_load_migrations() if migrations is None else migrations)
+    await connection.set_autocommit(True)
+
+    cursor = await connection.execute("SELECT pg_try_advisory_lock(%s)", (_LOCK_KEY,))
+    (locked,) = await cursor.fetchone()
+    if not locked:
+        print("Waiting for another migration run to finish...")
+        await connection.execute("SELECT pg_advisory_lock(%s)", (_LOCK_KEY,))
+    try:
+        await connection.execute(_CREATE_LEDGER)
+        cursor = await connection.execute("SELECT filename, checksum FROM schema_migrations")
+        applied = {filename: checksum for filename, checksum in await cursor.fetchall()}
+
+        pending = []
+        for migration in migrations:
+            checksum = applied.get(migration.name)
+            if checksum is None:
+                pending.append(migration)
+            elif checksum != migration.checksum:
+                raise MigrationError(f"{migration.name} was changed after it was applied")
+
+        for migration in pending:
+            await _apply_migration(connection, migration)
+    finally:
+        await connection.execute("SELECT pg_advisory_unlock(%s)", (_LOCK_KEY,))
+    return [migration.name for migration in pending]
 
 
 async def _run() -> None:
@@ -34,12 +144,15 @@ async def _run() -> None:
         print("No migrations found.")
         return
 
-    async with await AsyncConnection.connect(settings.database_url) as connection:
-        for migration in migrations:
-            await _apply_migration(connection, migration)
-        await connection.commit()
+    async with await AsyncConnection.connect(
+        settings.database_url, autocommit=True, **connection_options()
+    ) as connection:
+        applied = await apply_migrations(connection, migrations)
 
-    print("Migrations applied successfully.")
+    if applied:
+        print(f"Applied {len(applied)} migration(s).")
+    else:
+        print("Database is up to date.")
 
 
 def main() -> None:
@@ -1,18 +1,300 @@
 from __future__ import annotations
 
-from app.tasks.email import send_activation_email
+import asyncio
+import logging
+import queue
+import threading
+import time
+from typing import Any, Mapping, Sequence
+
+from redis.asyncio import Redis
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.repositories.outbox import OutboxRepository
+from app.tasks.batching import collect_batch
+from app.tasks.email import publish_activation_emails, send_activation_email
+
+_LOGGER = logging.getLogger(__name__)
+_STOP = object()
+
+_ENQUEUE_SECONDS = metrics.Histogram(
+    "email_enqueue_seconds",
+    "Time a request spent handing an activation email to CeleryEmailService.",
+    ("path",),
+)
+_ENQUEUE_QUEUED = _ENQUEUE_SECONDS.labels("publisher")
+_ENQUEUE_INLINE = _ENQUEUE_SECONDS.labels("inline")
+_ENQUEUE_BULK = _ENQUEUE_SECONDS.labels("bulk")
+# Only observed from the publisher thread.
+_PUBLISH_SECONDS = metrics.Histogram(
+    "email_publish_seconds",
+    "Time the background publisher spent publishing one batch to the broker.",
+)
 
 
 class EmailService:
+    # Transactional services write inside the caller's unit of work, so callers
+    # must send before committing rather than after.
+    transactional = False
+
     async def send_activation(self, email: str, code: str, ttl_seconds: int) -> None:
         raise NotImplementedError
 
+    async def send_activations(self, messages: Sequence[Mapping[str, Any]]) -> None:
+        """Send several emails given as ``email``, ``code`` and ``ttl_seconds`` mappings."""
+        for message in messages:
+            await self.send_activation(message["email"], message["code"], message["ttl_seconds"])
+
+
+class EmailPublisher:
+    """Publishes activation email tasks to the broker from a dedicated thread.
+
+    Request handlers only put messages on a bounded in-memory queue, so their
+    latency does not depend on the broker round trip or its connection retries.
+    Queued messages are published in batches of up to ``batch_size`` collected
+    over at most ``batch_window_seconds``.
+    """
+
+    def __init__(
+        self, max_queue_size: int, *, batch_size: int = 1, batch_window_seconds: float = 0.0
+    ) -> None:
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_queue_size)
+        self._batch_size = batch_size
+        self._batch_window_seconds = batch_window_seconds
+        self._thread: threading.Thread | None = None
+        self._abort = threading.Event()
+        self._published = 0
+        self._failed = 0
+        self._rejected = 0
+        self._publishes = 0
+        self._publish_seconds = 0.0
+        self._last_publish_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._abort.clear()
+        self._thread = threading.Thread(target=self._run, name="email-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Publish what is already queued, then stop the thread, within ``timeout``.
+
+        If the queue stays full (the broker is down) or publishing doesn't finish
+        in time, the thread stops after its current batch and the messages still
+        queued are dropped and logged.
+        """
+        if self._thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            self._abort.set()
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        self._abort.set()
+        self._thread = None
+
+        dropped = 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                dropped += 1
+        if dropped:
+            _LOGGER.warning(
+                "Email publisher stopped with messages still queued", extra={"dropped": dropped}
+            )
+
+    def submit(self, email: str, code: str, ttl_seconds: int) -> bool:
+        try:
+            self._queue.put_nowait({"email": email, "code": code, "ttl_seconds": ttl_seconds})
+        except queue.Full:
+            self._rejected += 1
+            return False
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "published": self._published,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "last_publish_seconds": self._last_publish_seconds,
+            "publishes": self._publishes,
+            "avg_publish_seconds": (
+                self._publish_seconds / self._publishes if self._publishes else 0.0
+            ),
+        }
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping and not self._abort.is_set():
+            batch, stopping = collect_batch(
+                self._queue,
+                max_size=self._batch_size,
+                window_seconds=self._batch_window_seconds,
+                sentinel=_STOP,
+            )
+            if batch:
+                self._publish(batch)
+
+    def _publish(self, batch: list[dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        try:
+            publish_activation_emails(batch, batch_size=self._batch_size)
+            self._published += len(batch)
+        except Exception:  # noqa: BLE001
+            self._failed += len(batch)
+            _LOGGER.exception("Failed to publish activation emails", extra={"count": len(batch)})
+        finally:
+            elapsed = time.perf_counter() - started
+            _PUBLISH_SECONDS.observe(elapsed)
+            self._publishes += 1
+            self._last_publish_seconds = elapsed
+            self._publish_seconds += elapsed
+
+
+_PUBLISHER: EmailPublisher | None = None
+
+
+def get_email_publisher() -> EmailPublisher:
+    """Return the singleton publisher used by :class:`CeleryEmailService`."""
+    global _PUBLISHER
+    if _PUBLISHER is None:
+        settings = get_settings()
+        _PUBLISHER = EmailPublisher(
+            settings.email_publish_queue_size,
+            batch_size=settings.email_batch_size,
+            batch_window_seconds=settings.email_batch_window_seconds,
+        )
+    return _PUBLISHER
+
+
+def _publisher_queue_samples() -> list[tuple[tuple[str, ...], float]]:
+    if _PUBLISHER is None:
+        return []
+    return [((), _PUBLISHER.stats()["queue_depth"])]
+
+
+def _publisher_message_samples() -> list[tuple[tuple[str, ...], float]]:
+    if _PUBLISHER is None:
+        return []
+    stats = _PUBLISHER.stats()
+    return [((outcome,), stats[outcome]) for outcome in ("published", "failed", "rejected")]
+
+
+metrics.CallbackGauge(
+    "email_publisher_queue_depth",
+    "Activation emails waiting for the background publisher.",
+    callback=_publisher_queue_samples,
+)
+metrics.CallbackCounter(
+    "email_publisher_messages_total",
+    "Activation emails handled by the background publisher, by outcome.",
+    ("outcome",),
+    callback=_publisher_message_samples,
+)
+
+
+def start_email_publisher() -> EmailPublisher:
+    publisher = get_email_publisher()
+    publisher.start()
+    return publisher
+
+
+def stop_email_publisher() -> None:
+    global _PUBLISHER
+    if _PUBLISHER is not None:
+        _PUBLISHER.stop()
+        _PUBLISHER = None
+
 
 class CeleryEmailService(EmailService):
     """Email service backed by Celery tasks."""
 
-    def __init__(self, queue: str | None = None) -> None:
+    def __init__(self, queue: str | None = None, publisher: EmailPublisher | None = None) -> None:
         self._queue = queue
+        self._publisher = publisher
+
+    async def send_activation(self, email: str, code: str, ttl_seconds: int) -> None:
+        started = time.perf_counter()
+        publisher = self._publisher or _PUBLISHER
+        if publisher is not None and publisher.running:
+            if publisher.submit(email, code, ttl_seconds):
+                _ENQUEUE_QUEUED.observe(time.perf_counter() - started)
+            else:
+                # The broker is slow or down. Publishing here would bring its latency
+                # back onto the request path, so the email is dropped; it is counted
+                # as rejected and the user can ask for a resend.
+                _LOGGER.warning("Email publish queue full, dropping email", extra={"to": email})
+            return
+        # No running publisher, e.g. outside the API lifespan: publish from a worker
+        # thread so the event loop still never blocks.
+        await asyncio.to_thread(send_activation_email.delay, email, code, ttl_seconds)
+        _ENQUEUE_INLINE.observe(time.perf_counter() - started)
+
+    async def send_activations(self, messages: Sequence[Mapping[str, Any]]) -> None:
+        # One publish over a single broker connection, grouped by EMAIL_BATCH_SIZE.
+        started = time.perf_counter()
+        await asyncio.to_thread(publish_activation_emails, messages)
+        _ENQUEUE_BULK.observe(time.perf_counter() - started)
+
+
+class OutboxEmailService(EmailService):
+    """Email service that records messages in the ``email_outbox`` table.
+
+    The row is written in the same transaction as the activation code and later
+    published in batches by ``app.scripts.outbox_relay``.
+    """
+
+    transactional = True
+
+    def __init__(self, outbox: OutboxRepository) -> None:
+        self._outbox = outbox
+
+    async def send_activation(self, email: str, code: str, ttl_seconds: int) -> None:
+        await self._outbox.enqueue(email, code, ttl_seconds)
+
+    async def send_activations(self, messages: Sequence[Mapping[str, Any]]) -> None:
+        await self._outbox.enqueue_many(messages)
+
+
+class RedisStreamEmailService(EmailService):
+    """Email service that appends jobs to the stream read by ``app.tasks.stream_worker``."""
+
+    def __init__(self, redis: Redis, stream: str, maxlen: int | None = None) -> None:
+        self._redis = redis
+        self._stream = stream
+        self._maxlen = maxlen
 
     async def send_activation(self, email: str, code: str, ttl_seconds: int) -> None:
-        send_activation_email.delay(email, code, ttl_seconds)
+        await self._redis.xadd(
+            self._stream,
+            {"email": email, "code": code, "ttl_seconds": ttl_seconds},
+            maxlen=self._maxlen,
+            approximate=True,
+        )
+
+    async def send_activations(self, messages: Sequence[Mapping[str, Any]]) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for message in messages:
+                pipe.xadd(
+                    self._stream,
+                    {
+                        "email": message["email"],
+                        "code": message["code"],
+                        "ttl_seconds": message["ttl_seconds"],
+                    },
+                    maxlen=self._maxlen,
+                    approximate=True,
+                )
+            await pipe.execute()
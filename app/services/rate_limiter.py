@@ -1,10 +1,88 @@
-"""Redis-backed rate limiter used by auth flows."""
+"""Redis-backed rate limiter used by auth flows.
+
+Each limiter decision is a single round trip: multi-step checks run as Lua scripts
+on the Redis server, so they are atomic with respect to concurrent requests.
+"""
 
 from __future__ import annotations
 
+import time
+from typing import Any, Awaitable
+
 from redis.asyncio import Redis
 
-from app.core import constants
+from app.core import constants, metrics
+
+# KEYS: attempts, lock. ARGV: attempt window, attempt limit, lock seconds.
+_RECORD_ACTIVATION_FAILURE = """
+local attempts = redis.call('INCR', KEYS[1])
+if attempts == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+if attempts >= tonumber(ARGV[2]) then
+    redis.call('SET', KEYS[2], '1', 'EX', ARGV[3])
+    redis.call('DEL', KEYS[1])
+end
+return attempts
+"""
+
+# KEYS: minute, daily. ARGV: per-minute limit, minute window, daily limit.
+# Returns {status, ttl}: 0 allowed (minute slot reserved), 1 minute limit, 2 daily limit.
+_CHECK_RESEND = """
+local per_minute = tonumber(ARGV[1])
+if per_minute > 0 then
+    local minute_ttl = redis.call('TTL', KEYS[1])
+    if minute_ttl > 0 then
+        return {1, minute_ttl}
+    end
+end
+local daily = tonumber(redis.call('GET', KEYS[2]) or '0')
+if daily >= tonumber(ARGV[3]) then
+    return {2, redis.call('TTL', KEYS[2])}
+end
+if per_minute > 0 then
+    redis.call('SET', KEYS[1], '1', 'EX', ARGV[2])
+end
+return {0, 0}
+"""
+
+# KEYS: minute, daily. ARGV: per-minute limit, minute window, daily window.
+_RECORD_RESEND = """
+if tonumber(ARGV[1]) > 0 then
+    redis.call('SET', KEYS[1], '1', 'EX', ARGV[2])
+end
+local total = redis.call('INCR', KEYS[2])
+if total == 1 then
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+end
+return total
+"""
+
+
+_REDIS_SECONDS = metrics.Histogram(
+    "rate_limiter_redis_seconds",
+    "Latency of the Redis round trip behind each rate limiter call.",
+    ("operation",),
+)
+_OBSERVERS = {
+    operation: _REDIS_SECONDS.labels(operation)
+    for operation in (
+        "ensure_activation_allowed",
+        "record_activation_failure",
+        "reset_activation",
+        "ensure_resend_allowed",
+        "release_resend",
+        "record_resend",
+    )
+}
+
+
+async def _timed(operation: str, command: Awaitable[Any]) -> Any:
+    started = time.perf_counter()
+    try:
+        return await command
+    finally:
+        _OBSERVERS[operation].observe(time.perf_counter() - started)
 
 
 class RateLimitExceeded(Exception):
@@ -14,14 +92,24 @@ class RateLimitExceeded(Exception):
 
 
 class RateLimiter:
-    """Minimal Redis-backed limiter for activation attempts and resends."""
+    """Minimal Redis-backed limiter for activation attempts and resends.
+
+    Building one registers its scripts, so callers keep one per Redis client.
+    """
+
     def __init__(self, redis: Redis) -> None:
         self._redis = redis
+        # Scripts are sent with EVALSHA and only re-uploaded if Redis lost its cache.
+        self._record_activation_failure = redis.register_script(_RECORD_ACTIVATION_FAILURE)
+        self._check_resend = redis.register_script(_CHECK_RESEND)
+        self._record_resend = redis.register_script(_RECORD_RESEND)
 
     # Activation ---------------------------------------------------------
 
     async def ensure_activation_allowed(self, email: str) -> None:
-        ttl = await self._redis.ttl(self._activation_lock_key(email))
+        ttl = await _timed(
+            "ensure_activation_allowed", self._redis.ttl(self._activation_lock_key(email))
+        )
         if ttl and ttl > 0:
             raise RateLimitExceeded(
                 "Too many activation attempts. Please try again later.",
@@ -29,57 +117,73 @@ class RateLimiter:
             )
 
     async def record_activation_failure(self, email: str) -> None:
-        attempts_key = self._activation_attempts_key(email)
-        attempts = await self._redis.incr(attempts_key)
-        if attempts == 1:
-            await self._redis.expire(attempts_key, constants.ACTIVATION_ATTEMPT_WINDOW_SECONDS)
-
-        if attempts >= constants.ACTIVATION_ATTEMPT_LIMIT:
-            await self._redis.set(
-                self._activation_lock_key(email),
-                "1",
-                ex=constants.ACTIVATION_LOCK_SECONDS,
-            )
-            await self._redis.delete(attempts_key)
+        await _timed(
+            "record_activation_failure",
+            self._record_activation_failure(
+                keys=[self._activation_attempts_key(email), self._activation_lock_key(email)],
+                args=[
+                    constants.ACTIVATION_ATTEMPT_WINDOW_SECONDS,
+                    constants.ACTIVATION_ATTEMPT_LIMIT,
+                    constants.ACTIVATION_LOCK_SECONDS,
+                ],
+            ),
+        )
 
     async def reset_activation(self, email: str) -> None:
-        await self._redis.delete(self._activation_attempts_key(email))
-        await self._redis.delete(self._activation_lock_key(email))
+        await _timed(
+            "reset_activation",
+            self._redis.delete(
+                self._activation_attempts_key(email), self._activation_lock_key(email)
+            ),
+        )
 
     # Resend -------------------------------------------------------------
 
     async def ensure_resend_allowed(self, email: str) -> None:
-        minute_ttl = await self._redis.ttl(self._resend_minute_key(email))
-        if (
-            constants.RESEND_PER_MINUTE_LIMIT > 0
-            and minute_ttl
-            and minute_ttl > 0
-        ):
+        """Check both resend windows and reserve the per-minute slot if allowed.
+
+        Reserving the slot in the same script closes the window in which two
+        concurrent requests could both pass the check before either is recorded.
+        Call :meth:`release_resend` if the resend then fails.
+        """
+        status, ttl = await _timed(
+            "ensure_resend_allowed",
+            self._check_resend(
+                keys=[self._resend_minute_key(email), self._resend_daily_key(email)],
+                args=[
+                    constants.RESEND_PER_MINUTE_LIMIT,
+                    constants.RESEND_MINUTE_WINDOW_SECONDS,
+                    constants.RESEND_DAILY_LIMIT,
+                ],
+            ),
+        )
+        if status == 1:
             raise RateLimitExceeded(
                 "Too many resend requests. Please wait before trying again.",
-                retry_after=minute_ttl,
+                retry_after=int(ttl),
             )
-
-        daily_count = await self._redis.get(self._resend_daily_key(email))
-        if daily_count is None:
-            return
-
-        if int(daily_count) >= constants.RESEND_DAILY_LIMIT:
-            ttl = await self._redis.ttl(self._resend_daily_key(email))
+        if status == 2:
             raise RateLimitExceeded(
                 "Daily resend limit reached. Please try again later.",
-                retry_after=ttl if ttl and ttl > 0 else None,
+                retry_after=int(ttl) if ttl and int(ttl) > 0 else None,
             )
 
+    async def release_resend(self, email: str) -> None:
+        """Give back the per-minute slot reserved for a resend that didn't happen."""
+        await _timed("release_resend", self._redis.delete(self._resend_minute_key(email)))
+
     async def record_resend(self, email: str) -> None:
-        minute_key = self._resend_minute_key(email)
-        if constants.RESEND_PER_MINUTE_LIMIT > 0:
-            await self._redis.set(minute_key, "1", ex=constants.RESEND_MINUTE_WINDOW_SECONDS)
-
-        daily_key = self._resend_daily_key(email)
-        total = await self._redis.incr(daily_key)
-        if total == 1:
-            await self._redis.expire(daily_key, constants.RESEND_DAILY_WINDOW_SECONDS)
+        await _timed(
+            "record_resend",
+            self._record_resend(
+                keys=[self._resend_minute_key(email), self._resend_daily_key(email)],
+                args=[
+                    constants.RESEND_PER_MINUTE_LIMIT,
+                    constants.RESEND_MINUTE_WINDOW_SECONDS,
+                    constants.RESEND_DAILY_WINDOW_SECONDS,
+                ],
+            ),
+        )
 
     # Key helpers --------------------------------------------------------
 
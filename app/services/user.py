@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Literal, Sequence
 
 from app.core.config import Settings
-from app.core.security import hash_password
+from app.core.security import hash_password_async, hash_passwords_async
 from app.repositories.activation import ActivationRepository
+from app.repositories.redis_activation import RedisActivationRepository
 from app.repositories.user import UserRepository
 from app.services.email import EmailService
 from app.utils.code_generator import generate_code
@@ -26,13 +28,21 @@ class UserNotFoundError(Exception):
 class ActivationResult:
     email: str
     code: str
+    user_id: int | None = None
+
+
+@dataclass
+class BatchRegistrationResult:
+    email: str
+    status: Literal["created", "pending", "active"]
+    user_id: int | None = None
 
 
 class UserService:
     def __init__(
         self,
         users: UserRepository,
-        activation_codes: ActivationRepository,
+        activation_codes: ActivationRepository | RedisActivationRepository,
         email_service: EmailService,
         settings: Settings,
     ) -> None:
@@ -42,44 +52,136 @@ class UserService:
         self._settings = settings
 
     async def register(self, email: str, password: str) -> ActivationResult:
-        password_hash = hash_password(password)
-        existing_user = await self._users.get_user_by_email(email)
-        if existing_user:
-            if existing_user.get("is_active"):
-                raise UserAlreadyActiveError(f"User {email} is already active")
-            raise UserPendingActivationError(
-                f"User {email} already registered and pending activation"
+        password_hash = await hash_password_async(password)
+        code = generate_code()
+        ttl_seconds = self._settings.activation_code_ttl_seconds
+        in_database = self._activation_codes.in_database
+        async with self._users.pipeline():
+            # Codes kept in Postgres are inserted by the same statement as the user.
+            user = await self._users.register_user(
+                email, password_hash, code=code if in_database else None, ttl_seconds=ttl_seconds
             )
+            if user is None or not user["created"]:
+                if user is not None and user["is_active"]:
+                    raise UserAlreadyActiveError(f"User {email} is already active")
+                raise UserPendingActivationError(
+                    f"User {email} already registered and pending activation"
+                )
+
+            if not in_database:
+                # Written before the commit, so a failure here rolls the user back.
+                await self._activation_codes.create_code(email, code, ttl_seconds=ttl_seconds)
+            result = ActivationResult(email=email, code=code, user_id=user["id"])
+            if self._email_service.transactional:
+                await self._send_activation_code(result)
+
+        if not self._email_service.transactional:
+            await self._send_activation_code(result)
+        return result
+
+    async def register_batch(
+        self, registrations: Sequence[tuple[str, str]]
+    ) -> list[BatchRegistrationResult]:
+        """Register several ``(email, password)`` pairs with one insert and one publish.
+
+        Returns one result per pair, in order. An email repeated in the batch is
+        registered once; its later occurrences report ``pending``.
+        """
+        passwords: dict[str, str] = {}
+        for email, password in registrations:
+            passwords.setdefault(email, password)
+        emails = list(passwords)
+        password_hashes = await hash_passwords_async(list(passwords.values()))
+        codes = [generate_code() for _ in emails]
+        ttl_seconds = self._settings.activation_code_ttl_seconds
 
-        await self._users.create_user(email, password_hash)
-        return await self._issue_activation_code(email)
+        in_database = self._activation_codes.in_database
+        async with self._users.pipeline():
+            rows = await self._users.register_users(
+                list(zip(emails, password_hashes, strict=True)),
+                codes=codes if in_database else None,
+                ttl_seconds=ttl_seconds,
+            )
+            users = {row["email"]: row for row in rows}
+            created = [
+                ActivationResult(email=email, code=code, user_id=users[email]["id"])
+                for email, code in zip(emails, codes, strict=True)
+                if email in users and users[email]["created"]
+            ]
+            if not in_database:
+                await self._activation_codes.create_codes(
+                    [(result.email, result.code) for result in created], ttl_seconds=ttl_seconds
+                )
+            if self._email_service.transactional:
+                await self._send_activation_codes(created)
+
+        if not self._email_service.transactional:
+            await self._send_activation_codes(created)
+
+        results = []
+        reported: set[str] = set()
+        for email, _ in registrations:
+            user = users.get(email)
+            if user is not None and user["created"] and email not in reported:
+                results.append(BatchRegistrationResult(email, "created", user["id"]))
+            elif user is not None and user["is_active"]:
+                results.append(BatchRegistrationResult(email, "active", user["id"]))
+            else:
+                results.append(
+                    BatchRegistrationResult(email, "pending", user["id"] if user else None)
+                )
+            reported.add(email)
+        return results
 
     async def request_activation_code(self, email: str) -> ActivationResult:
-        user = await self._users.get_user_by_email(email)
-        if user is None:
-            raise UserNotFoundError(f"User {email} not found")
-        if user.get("is_active"):
-            raise UserAlreadyActiveError(f"User {email} is already active")
-
-        return await self._issue_activation_code(email)
+        async with self._users.pipeline():
+            user = await self._users.get_user_by_email(email)
+            if user is None:
+                raise UserNotFoundError(f"User {email} not found")
+            if user.get("is_active"):
+                raise UserAlreadyActiveError(f"User {email} is already active")
 
-    async def activate(self, email: str, code: str) -> bool:
-        is_valid = await self._activation_codes.validate_code(email, code)
-        if not is_valid:
-            return False
+            result = await self._create_activation_code(email)
+            if self._email_service.transactional:
+                await self._send_activation_code(result)
 
-        await self._users.activate_user(email)
-        return True
+        if not self._email_service.transactional:
+            await self._send_activation_code(result)
+        return result
 
-    async def _issue_activation_code(self, email: str) -> ActivationResult:
+    async def activate(self, email: str, code: str) -> bool:
         ttl_seconds = self._settings.activation_code_ttl_seconds
+        if self._activation_codes.in_database:
+            activated = await self._users.activate_with_code(email, code, ttl_seconds=ttl_seconds)
+        else:
+            activated = await self._activation_codes.validate_code(
+                email, code, ttl_seconds=ttl_seconds
+            )
+            if activated:
+                await self._users.activate_user(email)
+        return activated
+
+    async def _create_activation_code(self, email: str) -> ActivationResult:
         code = generate_code()
         await self._activation_codes.create_code(
             email=email,
             code=code,
-            ttl_seconds=ttl_seconds,
+            ttl_seconds=self._settings.activation_code_ttl_seconds,
         )
-        print("--------------------")
-        print(code)
-        await self._email_service.send_activation(email, code, ttl_seconds)
         return ActivationResult(email=email, code=code)
+
+    async def _send_activation_codes(self, results: Sequence[ActivationResult]) -> None:
+        if not results:
+            return
+        ttl_seconds = self._settings.activation_code_ttl_seconds
+        await self._email_service.send_activations(
+            [
+                {"email": result.email, "code": result.code, "ttl_seconds": ttl_seconds}
+                for result in results
+            ]
+        )
+
+    async def _send_activation_code(self, result: ActivationResult) -> None:
+        await self._email_service.send_activation(
+            result.email, result.code, self._settings.activation_code_ttl_seconds
+        )
@@ -1 +1 @@
-from . import email  # noqa: F401 - ensure Celery discovers task module
+from . import email, maintenance  # noqa: F401 - ensure Celery discovers task modules
@@ -0,0 +1,37 @@
+"""Accumulate queued activation emails into batches for bulk publishing."""
+
+from __future__ import annotations
+
+import queue
+import time
+from typing import Any
+
+
+def collect_batch(
+    source: queue.Queue[Any],
+    *,
+    max_size: int,
+    window_seconds: float,
+    sentinel: object,
+) -> tuple[list[Any], bool]:
+    """Block for one item, then gather more until ``max_size`` or the window closes.
+
+    Returns the batch and whether ``sentinel`` was received, in which case the
+    caller should publish the batch and stop.
+    """
+    first = source.get()
+    if first is sentinel:
+        return [], True
+
+    batch = [first]
+    deadline = time.monotonic() + window_seconds
+    while len(batch) < max_size:
+        remaining = deadline - time.monotonic()
+        try:
+            item = source.get(timeout=remaining) if remaining > 0 else source.get_nowait()
+        except queue.Empty:
+            break
+        if item is sentinel:
+            return batch, True
+        batch.append(item)
+    return batch, False
@@ -1,15 +1,78 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+from typing import Any, Iterable, Mapping
 
 import httpx
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
 
 from app.core.celery_app import celery_app
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
 from app.utils.email import render_activation_email
 
 _LOGGER = logging.getLogger(__name__)
+_HTTP_CLIENT: httpx.Client | None = None
+
+
+def get_http_client() -> httpx.Client:
+    """Return this process's pooled HTTP client for the email API."""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None:
+        settings = get_settings()
+        options: dict[str, Any] = {
+            "timeout": settings.email_http_timeout_seconds,
+            "limits": httpx.Limits(
+                max_connections=settings.email_http_max_connections,
+                max_keepalive_connections=settings.email_http_max_keepalive_connections,
+                keepalive_expiry=settings.email_http_keepalive_expiry_seconds,
+            ),
+        }
+        try:
+            _HTTP_CLIENT = httpx.Client(http2=settings.email_http2, **options)
+        except ImportError:
+            _LOGGER.warning("HTTP/2 requested but the h2 package is missing, using HTTP/1.1")
+            _HTTP_CLIENT = httpx.Client(**options)
+    return _HTTP_CLIENT
+
+
+def close_http_client() -> None:
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is not None:
+        _HTTP_CLIENT.close()
+        _HTTP_CLIENT = None
+
+
+@worker_process_init.connect
+def _open_http_client(**_: Any) -> None:
+    global _HTTP_CLIENT
+    # A client inherited through fork shares its sockets with the parent; start fresh.
+    _HTTP_CLIENT = None
+    get_http_client()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _close_http_client(**_: Any) -> None:
+    close_http_client()
+
+
+def build_activation_payload(
+    settings: Settings, email: str, code: str, ttl_seconds: int
+) -> dict[str, Any]:
+    """Return the email API request body for one activation email."""
+    subject, body = render_activation_email(code, ttl_seconds)
+    return {
+        "from": settings.system_email,
+        "to": email,
+        "subject": subject,
+        "body": body,
+    }
+
+
+def _bulk_api_url(settings: Settings) -> str:
+    if settings.email_bulk_api_url is not None:
+        return str(settings.email_bulk_api_url)
+    return str(settings.email_api_url).rstrip("/") + "/bulk"
 
 
 @celery_app.task(
@@ -22,23 +85,85 @@ _LOGGER = logging.getLogger(__name__)
 )
 def send_activation_email(self, email: str, code: str, ttl_seconds: int) -> None:
     settings = get_settings()
-    subject, body = render_activation_email(code, ttl_seconds)
-
-    payload: dict[str, Any] = {
-        "from": settings.system_email,
-        "to": email,
-        "subject": subject,
-        "body": body,
-    }
+    payload: dict[str, Any] = build_activation_payload(settings, email, code, ttl_seconds)
 
     try:
-        response = httpx.post(
-            str(settings.email_api_url),
-            json=payload,
-            timeout=10,
-        )
+        response = get_http_client().post(str(settings.email_api_url), json=payload)
         response.raise_for_status()
         _LOGGER.info("Activation email dispatched via API", extra={"to": email})
     except Exception as exc:  # noqa: BLE001
         _LOGGER.warning("Activation email send failed, retrying", exc_info=exc)
         raise self.retry(exc=exc) from exc
+
+
+@celery_app.task(
+    bind=True,
+    name="send_activation_email_batch",
+    max_retries=5,
+    retry_backoff=True,
+    retry_jitter=True,
+)
+def send_activation_email_batch(self, messages: list[dict[str, Any]]) -> int:
+    """Send several activation emails in one bulk request to the email API.
+
+    If the request itself fails the whole batch is retried. Messages the API
+    rejects individually are re-enqueued as single ``send_activation_email``
+    tasks so they retry on their own without resending the rest of the batch.
+    """
+    settings = get_settings()
+    payloads = [
+        build_activation_payload(settings, m["email"], m["code"], m["ttl_seconds"])
+        for m in messages
+    ]
+
+    try:
+        response = get_http_client().post(_bulk_api_url(settings), json={"messages": payloads})
+        response.raise_for_status()
+        results = response.json()["results"]
+    except Exception as exc:  # noqa: BLE001
+        _LOGGER.warning("Bulk activation email send failed, retrying", exc_info=exc)
+        raise self.retry(exc=exc) from exc
+
+    failed = [
+        message
+        for index, message in enumerate(messages)
+        if index >= len(results) or results[index].get("status") != "ok"
+    ]
+    for message in failed:
+        _LOGGER.warning(
+            "Activation email rejected in batch, retrying alone", extra={"to": message["email"]}
+        )
+        send_activation_email.delay(message["email"], message["code"], message["ttl_seconds"])
+
+    _LOGGER.info(
+        "Activation email batch dispatched via API",
+        extra={"sent": len(messages) - len(failed), "failed": len(failed)},
+    )
+    return len(messages) - len(failed)
+
+
+def publish_activation_emails(
+    messages: Iterable[Mapping[str, Any]], batch_size: int | None = None
+) -> int:
+    """Publish activation email tasks over a single broker connection.
+
+    With a batch size above one, messages are grouped into
+    ``send_activation_email_batch`` tasks of at most that many emails.
+    """
+    if batch_size is None:
+        batch_size = get_settings().email_batch_size
+    pending = [dict(message) for message in messages]
+
+    with celery_app.producer_or_acquire() as producer:
+        if batch_size <= 1:
+            for message in pending:
+                send_activation_email.apply_async(
+                    (message["email"], message["code"], message["ttl_seconds"]),
+                    producer=producer,
+                )
+        else:
+            for start in range(0, len(pending), batch_size):
+                send_activation_email_batch.apply_async(
+                    (pending[start : start + batch_size],), producer=producer
+                )
+    return len(pending)
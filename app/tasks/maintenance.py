@@ -0,0 +1,199 @@
+"""Periodic database maintenance tasks.
+
+Usage: python -m app.tasks.maintenance
+
+Celery beat schedules ``maintain_activation_code_partitions`` every
+``ACTIVATION_CODE_PARTITION_INTERVAL_SECONDS`` and ``purge_activation_codes``
+every ``ACTIVATION_CODE_PURGE_INTERVAL_SECONDS``. The command above runs both
+once, for cron or a one-off cleanup.
+
+The tasks go to the ``maintenance`` queue, consumed by a worker started with
+``-Q maintenance --pool solo`` so they run in its main process. Set
+``MAINTENANCE_METRICS_PORT`` on that worker only: it then serves the metrics
+below on ``/metrics``, which the API can't see from its own process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+
+from celery.signals import worker_init
+from psycopg import AsyncConnection, errors
+
+from app.core import metrics
+from app.core.celery_app import celery_app
+from app.core.config import Settings, get_settings
+from app.core.database import connection_options
+from app.repositories.activation import ActivationRepository, partition_name
+
+_LOGGER = logging.getLogger(__name__)
+
+_PURGED = metrics.Counter(
+    "activation_codes_purged_total", "Expired activation codes deleted by the purge job."
+).labels()
+_PURGE_BATCH_SECONDS = metrics.Histogram(
+    "activation_code_purge_batch_seconds", "Time to delete one batch of expired activation codes."
+).labels()
+_PARTITION_CHANGES = metrics.Counter(
+    "activation_code_partitions_total",
+    "Daily activation_codes partitions created or dropped by the maintenance job.",
+    ("action",),
+)
+_PARTITIONS_CREATED = _PARTITION_CHANGES.labels("created")
+_PARTITIONS_DROPPED = _PARTITION_CHANGES.labels("dropped")
+
+
+@worker_init.connect
+def _start_metrics_server(**_: Any) -> None:
+    port = get_settings().maintenance_metrics_port
+    if port is not None:
+        metrics.start_http_server(port)
+        _LOGGER.info("Serving maintenance metrics on port %s", port)
+
+
+async def purge_expired_codes(
+    codes: ActivationRepository,
+    *,
+    retention_seconds: float,
+    batch_size: int,
+    pause_seconds: float = 0.0,
+) -> int:
+    """Delete codes expired for longer than ``retention_seconds``, batch by batch.
+
+    Each batch commits on its own, so row locks are held briefly and autovacuum
+    can reclaim the space as the purge goes. The cutoff is fixed when the purge
+    starts and the loop ends at the first short batch.
+    """
+    expired_before = datetime.now(timezone.utc) - timedelta(seconds=retention_seconds)
+    purged = 0
+    while True:
+        started = time.perf_counter()
+        deleted = await codes.purge_expired(expired_before=expired_before, limit=batch_size)
+        _PURGE_BATCH_SECONDS.observe(time.perf_counter() - started)
+        _PURGED.inc(deleted)
+        purged += deleted
+        if deleted < batch_size:
+            return purged
+        await asyncio.sleep(pause_seconds)
+
+
+async def maintain_partitions(
+    codes: ActivationRepository,
+    *,
+    days_ahead: int,
+    retention_seconds: float,
+    today: date | None = None,
+) -> tuple[list[date], list[date]]:
+    """Create the partitions up to ``days_ahead`` days out and drop expired ones.
+
+    A partition is dropped once its day ended more than ``retention_seconds``
+    ago and none of its codes expires within the retention period. A partition
+    whose table lock times out is skipped until the next run. Returns the days
+    created and dropped.
+    """
+    now = datetime.now(timezone.utc)
+    today = today or now.date()
+    existing = set(await codes.list_partitions())
+
+    created = []
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        if day in existing:
+            continue
+        try:
+            await codes.create_partition(day)
+        except errors.CheckViolation:
+            # Rows for the day already went to the default partition; the row purge
+            # removes them and the partition is created on a later run.
+            _LOGGER.warning("Default partition holds rows for %s", partition_name(day))
+            continue
+        except errors.LockNotAvailable:
+            _LOGGER.warning("Timed out locking activation_codes to create %s", partition_name(day))
+            continue
+        _PARTITIONS_CREATED.inc()
+        created.append(day)
+
+    expired_before = now - timedelta(seconds=retention_seconds)
+    dropped = []
+    for day in sorted(existing):
+        if day + timedelta(days=1) > expired_before.date():
+            break
+        try:
+            if not await codes.drop_partition(day, expired_before=expired_before):
+                continue
+        except errors.LockNotAvailable:
+            _LOGGER.warning("Timed out locking activation_codes to drop %s", partition_name(day))
+            continue
+        _PARTITIONS_DROPPED.inc()
+        dropped.append(day)
+    return created, dropped
+
+
+async def _maintain_partitions(settings: Settings) -> tuple[list[date], list[date]]:
+    async with await AsyncConnection.connect(
+        settings.database_url, **connection_options()
+    ) as connection:
+        created, dropped = await maintain_partitions(
+            ActivationRepository(connection),
+            days_ahead=settings.activation_code_partition_days_ahead,
+            retention_seconds=settings.activation_code_retention_seconds,
+        )
+    _LOGGER.info(
+        "Maintained activation code partitions",
+        extra={
+            "created": [partition_name(day) for day in created],
+            "dropped": [partition_name(day) for day in dropped],
+        },
+    )
+    return created, dropped
+
+
+async def _purge(settings: Settings) -> int:
+    started = time.perf_counter()
+    async with await AsyncConnection.connect(
+        settings.database_url, **connection_options()
+    ) as connection:
+        purged = await purge_expired_codes(
+            ActivationRepository(connection),
+            retention_seconds=settings.activation_code_retention_seconds,
+            batch_size=settings.activation_code_purge_batch_size,
+            pause_seconds=settings.activation_code_purge_pause_seconds,
+        )
+    elapsed = time.perf_counter() - started
+    _LOGGER.info(
+        "Purged expired activation codes",
+        extra={
+            "purged": purged,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(purged / elapsed, 1) if elapsed else 0.0,
+        },
+    )
+    return purged
+
+
+@celery_app.task(name="purge_activation_codes")
+def purge_activation_codes() -> int:
+    return asyncio.run(_purge(get_settings()))
+
+
+@celery_app.task(name="maintain_activation_code_partitions")
+def maintain_activation_code_partitions() -> dict[str, int]:
+    created, dropped = asyncio.run(_maintain_partitions(get_settings()))
+    return {"created": len(created), "dropped": len(dropped)}
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    settings = get_settings()
+    created, dropped = asyncio.run(_maintain_partitions(settings))
+    print(f"Created {len(created)} and dropped {len(dropped)} activation code partitions")
+    purged = asyncio.run(_purge(settings))
+    print(f"Purged {purged} expired activation codes")
+
+
+if __name__ == "__main__":
+    main()
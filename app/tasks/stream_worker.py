@@ -0,0 +1,195 @@
+"""Asyncio email worker consuming activation jobs from a Redis Stream.
+
+Usage: python -m app.tasks.stream_worker [--consumer NAME]
+
+Jobs are written by ``RedisStreamEmailService`` and read through a consumer
+group, so several workers can share the stream. Each worker keeps up to
+``EMAIL_STREAM_CONCURRENCY`` sends in flight on one ``httpx.AsyncClient``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import signal
+import socket
+from typing import Any
+
+import httpx
+import redis.asyncio as redis
+from redis.exceptions import ResponseError
+
+from app.core.config import Settings, get_settings
+from app.tasks.email import build_activation_payload
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class StreamEmailWorker:
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        http_client: httpx.AsyncClient,
+        settings: Settings,
+        consumer: str,
+    ) -> None:
+        self._redis = redis_client
+        self._http = http_client
+        self._settings = settings
+        self._consumer = consumer
+        self._stream = settings.email_stream_name
+        self._group = settings.email_stream_group
+        self._dead_letter_stream = f"{settings.email_stream_name}:dead"
+        self._concurrency = settings.email_stream_concurrency
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._in_flight: set[str] = set()
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def ensure_group(self) -> None:
+        try:
+            await self._redis.xgroup_create(self._stream, self._group, id="0", mkstream=True)
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    async def run(self) -> None:
+        await self.ensure_group()
+        loop = asyncio.get_running_loop()
+        next_claim = 0.0
+        try:
+            while not self._stopping.is_set():
+                if loop.time() >= next_claim:
+                    await self._claim_stale()
+                    next_claim = loop.time() + self._settings.email_stream_claim_idle_ms / 2000
+
+                available = self._concurrency - len(self._tasks)
+                if available <= 0:
+                    await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+
+                response = await self._redis.xreadgroup(
+                    self._group,
+                    self._consumer,
+                    {self._stream: ">"},
+                    count=available,
+                    block=1000,
+                )
+                for _, messages in response or []:
+                    for message_id, fields in messages:
+                        self._spawn(message_id, fields)
+        finally:
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _claim_stale(self) -> None:
+        """Take over messages left pending by consumers that stopped responding."""
+        start = "0-0"
+        while True:
+            available = self._concurrency - len(self._tasks)
+            if available <= 0:
+                return
+            result = await self._redis.xautoclaim(
+                self._stream,
+                self._group,
+                self._consumer,
+                min_idle_time=self._settings.email_stream_claim_idle_ms,
+                start_id=start,
+                count=available,
+            )
+            start, messages = result[0], result[1]
+            for message_id, fields in messages:
+                if fields:
+                    self._spawn(message_id, fields)
+            if start in ("0-0", b"0-0") or not messages:
+                return
+
+    def _spawn(self, message_id: str, fields: dict[str, Any]) -> None:
+        if message_id in self._in_flight:
+            return
+        self._in_flight.add(message_id)
+        task = asyncio.create_task(self.handle(message_id, fields))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda _: self._in_flight.discard(message_id))
+
+    async def handle(self, message_id: str, fields: dict[str, Any]) -> None:
+        max_attempts = self._settings.email_stream_max_attempts
+        for attempt in range(1, max_attempts + 1):
+            try:
+                await self._send(fields)
+            except Exception as exc:  # noqa: BLE001
+                if attempt == max_attempts:
+                    _LOGGER.error(
+                        "Activation email failed permanently",
+                        exc_info=exc,
+                        extra={"to": fields.get("email")},
+                    )
+                    await self._redis.xadd(self._dead_letter_stream, fields)
+                    break
+                _LOGGER.warning("Activation email send failed, retrying", exc_info=exc)
+                # Reset the idle time so other consumers don't claim it during the backoff.
+                await self._redis.xclaim(
+                    self._stream,
+                    self._group,
+                    self._consumer,
+                    min_idle_time=0,
+                    message_ids=[message_id],
+                    justid=True,
+                )
+                await asyncio.sleep(self._backoff(attempt))
+            else:
+                _LOGGER.info("Activation email dispatched via API", extra={"to": fields["email"]})
+                break
+        await self._redis.xack(self._stream, self._group, message_id)
+
+    def _backoff(self, attempt: int) -> float:
+        cap = self._settings.email_stream_claim_idle_ms / 4000
+        delay = min(self._settings.email_stream_backoff_seconds * 2 ** (attempt - 1), cap)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _send(self, fields: dict[str, Any]) -> None:
+        payload = build_activation_payload(
+            self._settings, fields["email"], fields["code"], int(fields["ttl_seconds"])
+        )
+        response = await self._http.post(str(self._settings.email_api_url), json=payload)
+        response.raise_for_status()
+
+
+async def _run(consumer: str) -> None:
+    settings = get_settings()
+    redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+    limits = httpx.Limits(
+        max_connections=settings.email_stream_concurrency,
+        max_keepalive_connections=settings.email_stream_concurrency,
+        keepalive_expiry=settings.email_http_keepalive_expiry_seconds,
+    )
+    try:
+        async with httpx.AsyncClient(
+            timeout=settings.email_http_timeout_seconds, limits=limits
+        ) as http_client:
+            worker = StreamEmailWorker(redis_client, http_client, settings, consumer)
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, worker.stop)
+            _LOGGER.info("Consuming %s as %s", settings.email_stream_name, consumer)
+            await worker.run()
+    finally:
+        await redis_client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--consumer", default=socket.gethostname())
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run(args.consumer))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,23 @@ from fastapi import HTTPException
 from fastapi.security import HTTPBasicCredentials
 
 from app.api.deps import authenticate_basic_user
+from app.core.config import get_settings
+from app.core.credential_cache import get_credential_cache
 from app.core.security import hash_password
+from app.repositories.activation import ActivationRepository
 from app.repositories.user import UserRepository
+from app.services.user import UserService
+
+
+@pytest.fixture(autouse=True)
+def override_settings(settings_env):
+    yield
 
 
 @pytest.mark.asyncio
 async def test_basic_auth_success(db_conn) -> None:
     repo = UserRepository(db_conn)
-    await repo.create_user("alice@example.com", hash_password("SuperSecret1!"))
+    await repo.register_user("alice@example.com", hash_password("SuperSecret1!"))
 
     credentials = HTTPBasicCredentials(username="alice@example.com", password="SuperSecret1!")
     user = await authenticate_basic_user(credentials, repo)
@@ -24,7 +33,7 @@ async def test_basic_auth_success(db_conn) -> None:
 @pytest.mark.asyncio
 async def test_basic_auth_wrong_password(db_conn) -> None:
     repo = UserRepository(db_conn)
-    await repo.create_user("bob@example.com", hash_password("CorrectHorse1!"))
+    await repo.register_user("bob@example.com", hash_password("CorrectHorse1!"))
 
     credentials = HTTPBasicCredentials(username="bob@example.com", password="WrongPassword")
     with pytest.raises(HTTPException) as exc:
@@ -42,3 +51,27 @@ async def test_basic_auth_unknown_user(db_conn) -> None:
         await authenticate_basic_user(credentials, repo)
 
     assert exc.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_basic_auth_uses_cache_until_activation(db_conn, mocker) -> None:
+    repo = UserRepository(db_conn)
+    email_service = mocker.Mock(transactional=False)
+    email_service.send_activation = mocker.AsyncMock()
+    service = UserService(repo, ActivationRepository(db_conn), email_service, get_settings())
+    registered = await service.register("carol@example.com", "Passw0rd!1")
+    credentials = HTTPBasicCredentials(username="carol@example.com", password="Passw0rd!1")
+
+    first = await authenticate_basic_user(credentials, repo)
+    lookup = mocker.spy(repo, "get_user_by_email")
+    second = await authenticate_basic_user(credentials, repo)
+
+    assert second == first
+    lookup.assert_not_called()
+
+    assert await service.activate("carol@example.com", registered.code) is True
+    assert len(get_credential_cache()) == 0
+
+    refreshed = await authenticate_basic_user(credentials, repo)
+    assert refreshed["is_active"] is True
+    lookup.assert_called_once()
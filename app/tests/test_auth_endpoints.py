@@ -7,7 +7,7 @@ import pytest_asyncio
 from fastapi import status
 from httpx import ASGITransport, AsyncClient, BasicAuth
 
-from app.api.deps import get_db_connection, get_rate_limiter, get_user_service
+from app.api.deps import get_db_pool, get_rate_limiter, get_user_service
 from app.core.config import get_settings
 from app.main import app
 from app.repositories.activation import ActivationRepository
@@ -58,9 +58,12 @@ class MemoryRateLimiter:
             raise RateLimitExceeded("Too many resend requests.")
         if self.daily_resends.get(email, 0) >= self.daily_resend:
             raise RateLimitExceeded("Daily resend limit reached.")
+        self.minute_resends[email] = self.minute_resends.get(email, 0) + 1
+
+    async def release_resend(self, email: str) -> None:
+        self.minute_resends[email] -= 1
 
     async def record_resend(self, email: str) -> None:
-        self.minute_resends[email] = self.minute_resends.get(email, 0) + 1
         self.daily_resends[email] = self.daily_resends.get(email, 0) + 1
 
 
@@ -82,13 +85,10 @@ async def api_client(db_conn, monkeypatch: pytest.MonkeyPatch, settings_env):
     service = UserService(user_repo, activation_repo, email_service, settings)
     rate_limiter = MemoryRateLimiter(max_activation_attempts=2, per_minute_resend=1, daily_resend=2)
 
-    async def _get_db_connection_override():
-        yield db_conn
-
     async def _get_user_service_override():
         return service
 
-    app.dependency_overrides[get_db_connection] = _get_db_connection_override
+    app.dependency_overrides[get_db_pool] = lambda: db_conn
     app.dependency_overrides[get_user_service] = _get_user_service_override
     app.dependency_overrides[get_rate_limiter] = lambda: rate_limiter
 
@@ -293,3 +293,65 @@ async def test_resend_active_user_conflict(api_client):
 
     response = await client.post("/auth/resend", auth=BasicAuth("zoe@example.com", "Passw0rd!1"))
     assert response.status_code == status.HTTP_409_CONFLICT
+    assert rate_limiter.minute_resends["zoe@example.com"] == 0
+    assert "zoe@example.com" not in rate_limiter.daily_resends
+
+
+@pytest.mark.asyncio
+async def test_session_token_authenticates_follow_up_requests(api_client):
+    client, email_service, _ = api_client
+
+    response = await client.post(
+        "/auth/register", json={"email": "token@example.com", "password": "Passw0rd!1"}
+    )
+    token = response.json()["token"]
+    code = email_service.sent_codes["token@example.com"]
+
+    activated = await client.post(
+        "/auth/activate", json={"code": code}, headers={"Authorization": f"Bearer {token}"}
+    )
+    assert activated.status_code == status.HTTP_200_OK
+
+    invalid = await client.post(
+        "/auth/resend", headers={"Authorization": f"Bearer {token}tampered"}
+    )
+    assert invalid.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_token_endpoint_requires_basic_auth(api_client):
+    client, *_ = api_client
+
+    await client.post(
+        "/auth/register", json={"email": "login@example.com", "password": "Passw0rd!1"}
+    )
+
+    response = await client.post("/auth/token", auth=BasicAuth("login@example.com", "Passw0rd!1"))
+    assert response.status_code == status.HTTP_200_OK
+    token = response.json()["token"]
+
+    refresh = await client.post("/auth/token", headers={"Authorization": f"Bearer {token}"})
+    assert refresh.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_register_batch_requires_partner_credentials(api_client):
+    client, email_service, _ = api_client
+    payload = [
+        {"email": "partner-a@example.com", "password": "Passw0rd!1"},
+        {"email": "partner-b@example.com", "password": "Passw0rd!1"},
+    ]
+
+    anonymous = await client.post("/auth/register/batch", json=payload)
+    assert anonymous.status_code == status.HTTP_401_UNAUTHORIZED
+    wrong = await client.post(
+        "/auth/register/batch", json=payload, auth=BasicAuth("admin", "wrong")
+    )
+    assert wrong.status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = await client.post(
+        "/auth/register/batch", json=payload, auth=BasicAuth("admin", "changeme")
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["status"] for item in response.json()["results"]] == ["created", "created"]
+    assert set(email_service.sent_codes) == {"partner-a@example.com", "partner-b@example.com"}
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from app.core import database
+from app.scripts import bench_hot_paths
+
+
+def test_collect_cases_sets_up_only_the_filtered_cases(mocker) -> None:
+    hash_password = mocker.patch("app.core.security.hash_password")
+    pool = database._POOL
+
+    cases = bench_hot_paths.collect_cases("rate_limiter")
+
+    assert sorted(cases) == ["rate_limiter.activation_keys", "rate_limiter.resend_keys"]
+    hash_password.assert_not_called()
+    assert database._POOL is pool
+
+
+def test_find_regressions_ignores_small_absolute_slowdowns() -> None:
+    baseline = {"fast": 1.0, "slow": 100.0}
+    results = {"fast": 1.5, "slow": 150.0}
+
+    assert bench_hot_paths.find_regressions(results, baseline, 0.25) == {"fast": 1.5, "slow": 1.5}
+    assert bench_hot_paths.find_regressions(results, baseline, 0.25, min_delta_us=1.0) == {
+        "slow": 1.5
+    }
@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+import json
+import queue
+import threading
+import time
+
 import httpx
 import pytest
+import pytest_asyncio
 from pytest_mock import MockerFixture
 
-from app.services.email import CeleryEmailService
+from app.core.config import get_settings
+from app.services.email import CeleryEmailService, EmailPublisher, RedisStreamEmailService
 from app.tasks import email as email_tasks
+from app.tasks.batching import collect_batch
+from app.tasks.stream_worker import StreamEmailWorker
 
 
 @pytest.mark.asyncio
@@ -21,7 +30,10 @@ async def test_celery_email_service_enqueues(mocker: MockerFixture) -> None:
 def test_send_activation_email_success(settings_env, mocker: MockerFixture) -> None:
     response = mocker.Mock(spec=httpx.Response)
     response.raise_for_status.return_value = None
-    post = mocker.patch("httpx.post", return_value=response)
+    client = mocker.Mock(spec=httpx.Client)
+    client.post.return_value = response
+    mocker.patch("app.tasks.email.get_http_client", return_value=client)
+    post = client.post
 
     retry = mocker.patch.object(
         email_tasks.send_activation_email,
@@ -39,7 +51,9 @@ def test_send_activation_email_success(settings_env, mocker: MockerFixture) -> N
 
 
 def test_send_activation_email_retries(settings_env, mocker: MockerFixture) -> None:
-    mocker.patch("httpx.post", side_effect=httpx.HTTPError("boom"))
+    client = mocker.Mock(spec=httpx.Client)
+    client.post.side_effect = httpx.HTTPError("boom")
+    mocker.patch("app.tasks.email.get_http_client", return_value=client)
 
     retry = mocker.patch.object(
         email_tasks.send_activation_email, "retry", side_effect=RuntimeError("retry")
@@ -51,3 +65,228 @@ def test_send_activation_email_retries(settings_env, mocker: MockerFixture) -> N
     assert retry.call_count >= 1
     first_call = retry.call_args_list[0]
     assert isinstance(first_call.kwargs.get("exc"), httpx.HTTPError)
+
+
+@pytest.mark.asyncio
+async def test_celery_email_service_publishes_from_background_thread(
+    mocker: MockerFixture,
+) -> None:
+    publish = mocker.patch("app.services.email.publish_activation_emails")
+    publisher = EmailPublisher(max_queue_size=10)
+    publisher.start()
+
+    service = CeleryEmailService(publisher=publisher)
+    await service.send_activation("user@example.com", "1234", 60)
+    publisher.stop()
+
+    publish.assert_called_once_with(
+        [{"email": "user@example.com", "code": "1234", "ttl_seconds": 60}], batch_size=1
+    )
+    stats = publisher.stats()
+    assert stats["published"] == 1
+    assert stats["queue_depth"] == 0
+
+
+def test_publisher_stop_does_not_hang_on_a_full_queue(
+    mocker: MockerFixture, caplog: pytest.LogCaptureFixture
+) -> None:
+    release = threading.Event()
+    mocker.patch(
+        "app.services.email.publish_activation_emails", side_effect=lambda *_, **__: release.wait()
+    )
+    publisher = EmailPublisher(max_queue_size=1)
+    publisher.start()
+    publisher.submit("first@example.com", "1111", 60)
+    while publisher.stats()["queue_depth"]:
+        time.sleep(0.001)
+    publisher.submit("queued@example.com", "2222", 60)
+
+    started = time.monotonic()
+    publisher.stop(timeout=0.05)
+    release.set()
+
+    assert time.monotonic() - started < 1
+    assert publisher.stats()["queue_depth"] == 0
+    assert any(getattr(record, "dropped", None) == 1 for record in caplog.records)
+
+
+@pytest.mark.asyncio
+async def test_celery_email_service_drops_email_when_queue_full(mocker: MockerFixture) -> None:
+    delay = mocker.patch("app.tasks.email.send_activation_email.delay")
+    publisher = EmailPublisher(max_queue_size=1)
+    mocker.patch.object(
+        EmailPublisher, "running", new_callable=mocker.PropertyMock, return_value=True
+    )
+    publisher.submit("queued@example.com", "0000", 60)
+
+    service = CeleryEmailService(publisher=publisher)
+    await service.send_activation("user@example.com", "1234", 60)
+
+    delay.assert_not_called()
+    assert publisher.stats()["rejected"] == 1
+
+
+def test_publish_activation_emails_shares_one_producer(mocker: MockerFixture) -> None:
+    producer = mocker.MagicMock()
+    mocker.patch.object(email_tasks.celery_app, "producer_or_acquire", return_value=producer)
+    apply_async = mocker.patch.object(email_tasks.send_activation_email, "apply_async")
+
+    published = email_tasks.publish_activation_emails(
+        [
+            {"email": "a@example.com", "code": "1111", "ttl_seconds": 60},
+            {"email": "b@example.com", "code": "2222", "ttl_seconds": 60},
+        ],
+        batch_size=1,
+    )
+
+    assert published == 2
+    producer.__enter__.assert_called_once()
+    assert [c.args[0] for c in apply_async.call_args_list] == [
+        ("a@example.com", "1111", 60),
+        ("b@example.com", "2222", 60),
+    ]
+    active_producer = producer.__enter__.return_value
+    assert all(c.kwargs["producer"] is active_producer for c in apply_async.call_args_list)
+
+
+def test_http_client_is_reused_until_closed(settings_env) -> None:
+    email_tasks.close_http_client()
+    try:
+        client = email_tasks.get_http_client()
+        assert email_tasks.get_http_client() is client
+    finally:
+        email_tasks.close_http_client()
+
+    assert client.is_closed
+
+
+def test_publish_activation_emails_groups_batches(mocker: MockerFixture) -> None:
+    mocker.patch.object(email_tasks.celery_app, "producer_or_acquire")
+    apply_async = mocker.patch.object(email_tasks.send_activation_email_batch, "apply_async")
+    messages = [
+        {"email": f"user{i}@example.com", "code": "1234", "ttl_seconds": 60} for i in range(5)
+    ]
+
+    assert email_tasks.publish_activation_emails(messages, batch_size=2) == 5
+    assert [len(c.args[0][0]) for c in apply_async.call_args_list] == [2, 2, 1]
+
+
+def test_collect_batch_stops_at_size_window_or_sentinel() -> None:
+    source: queue.Queue = queue.Queue()
+    stop = object()
+    for item in (1, 2, 3):
+        source.put(item)
+
+    assert collect_batch(source, max_size=2, window_seconds=1, sentinel=stop) == ([1, 2], False)
+    assert collect_batch(source, max_size=2, window_seconds=0.01, sentinel=stop) == ([3], False)
+
+    source.put(4)
+    source.put(stop)
+    assert collect_batch(source, max_size=5, window_seconds=1, sentinel=stop) == ([4], True)
+
+
+def test_send_activation_email_batch_retries_rejected_messages_alone(
+    settings_env, mocker: MockerFixture
+) -> None:
+    response = mocker.Mock(spec=httpx.Response)
+    response.json.return_value = {"results": [{"status": "ok"}, {"status": "error"}]}
+    client = mocker.Mock(spec=httpx.Client)
+    client.post.return_value = response
+    mocker.patch("app.tasks.email.get_http_client", return_value=client)
+    delay = mocker.patch("app.tasks.email.send_activation_email.delay")
+
+    sent = email_tasks.send_activation_email_batch.run(
+        [
+            {"email": "ok@example.com", "code": "1111", "ttl_seconds": 60},
+            {"email": "bad@example.com", "code": "2222", "ttl_seconds": 60},
+        ]
+    )
+
+    assert sent == 1
+    url = client.post.call_args.args[0]
+    assert url == "https://email-api.example.com/v1/send/bulk"
+    assert [m["to"] for m in client.post.call_args.kwargs["json"]["messages"]] == [
+        "ok@example.com",
+        "bad@example.com",
+    ]
+    delay.assert_called_once_with("bad@example.com", "2222", 60)
+
+
+def test_send_activation_email_batch_retries_whole_batch_on_transport_error(
+    settings_env, mocker: MockerFixture
+) -> None:
+    client = mocker.Mock(spec=httpx.Client)
+    client.post.side_effect = httpx.HTTPError("boom")
+    mocker.patch("app.tasks.email.get_http_client", return_value=client)
+    retry = mocker.patch.object(
+        email_tasks.send_activation_email_batch, "retry", side_effect=RuntimeError("retry")
+    )
+
+    with pytest.raises(RuntimeError):
+        email_tasks.send_activation_email_batch.run(
+            [{"email": "user@example.com", "code": "1234", "ttl_seconds": 60}]
+        )
+
+    retry.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_redis_stream_email_service_appends_job(mocker: MockerFixture) -> None:
+    redis_client = mocker.Mock()
+    redis_client.xadd = mocker.AsyncMock()
+
+    service = RedisStreamEmailService(redis_client, "email:activation", maxlen=100)
+    await service.send_activation("user@example.com", "1234", 60)
+
+    redis_client.xadd.assert_awaited_once_with(
+        "email:activation",
+        {"email": "user@example.com", "code": "1234", "ttl_seconds": 60},
+        maxlen=100,
+        approximate=True,
+    )
+
+
+@pytest_asyncio.fixture
+async def stream_worker(request: pytest.FixtureRequest, settings_env, mocker: MockerFixture):
+    """A worker whose email API answers with ``request.param`` (default 200)."""
+    status_code = getattr(request, "param", 200)
+    sent: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(json.loads(request.content)["to"])
+        return httpx.Response(status_code, json={})
+
+    redis_client = mocker.Mock()
+    for command in ("xack", "xadd", "xclaim"):
+        setattr(redis_client, command, mocker.AsyncMock())
+    settings = get_settings().model_copy(
+        update={"email_stream_max_attempts": 2, "email_stream_backoff_seconds": 0}
+    )
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        yield StreamEmailWorker(redis_client, http_client, settings, "worker-1"), redis_client, sent
+
+
+@pytest.mark.asyncio
+async def test_stream_worker_acknowledges_sent_email(stream_worker) -> None:
+    worker, redis_client, sent = stream_worker
+    fields = {"email": "user@example.com", "code": "1234", "ttl_seconds": "60"}
+
+    await worker.handle("1-0", fields)
+
+    assert sent == ["user@example.com"]
+    redis_client.xack.assert_awaited_once_with("email:activation", "email-senders", "1-0")
+    redis_client.xadd.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("stream_worker", [503], indirect=True)
+async def test_stream_worker_dead_letters_after_retries(stream_worker) -> None:
+    worker, redis_client, sent = stream_worker
+    fields = {"email": "user@example.com", "code": "1234", "ttl_seconds": "60"}
+
+    await worker.handle("1-0", fields)
+
+    assert sent == ["user@example.com", "user@example.com"]
+    redis_client.xclaim.assert_awaited_once()
+    redis_client.xadd.assert_awaited_once_with("email:activation:dead", fields)
+    redis_client.xack.assert_awaited_once_with("email:activation", "email-senders", "1-0")
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.routes import health
+from app.core import database
+
+
+@pytest.fixture
+def health_client():
+    app = FastAPI()
+    app.include_router(health.router, prefix="/health")
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_ready_reports_unavailable_without_open_pool(health_client, monkeypatch) -> None:
+    monkeypatch.setattr(database, "_POOL", None)
+
+    async with health_client as client:
+        response = await client.get("/health/ready")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "unavailable"
+
+
+@pytest.mark.asyncio
+async def test_ready_reports_pool_stats(health_client, mocker, monkeypatch) -> None:
+    pool = mocker.Mock(closed=False)
+    pool.get_stats.return_value = {"pool_size": 2, "pool_available": 1, "requests_waiting": 0}
+    monkeypatch.setattr(database, "_POOL", pool)
+
+    async with health_client as client:
+        response = await client.get("/health/ready")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "status": "ready",
+        "database_pool": {"pool_size": 2, "pool_available": 1, "requests_waiting": 0},
+    }
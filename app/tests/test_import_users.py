@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import io
+
+import pytest
+
+from app.scripts.import_users import (
+    ImportStats,
+    InvalidRecord,
+    batches,
+    import_batch,
+    parse_record,
+    read_records,
+)
+
+_HASH = "$2b$12$" + "a" * 53
+
+
+def test_read_records_and_batches_skip_invalid_rows() -> None:
+    csv_input = io.StringIO(
+        "email,password_hash,is_active\n"
+        f"one@example.com,{_HASH},true\n"
+        "two@example.com,plaintext,false\n"
+        f"three@example.com,{_HASH},\n"
+        f"not-an-email,{_HASH},no\n"
+    )
+    stats = ImportStats()
+
+    result = list(batches(read_records(csv_input, "csv"), 1, stats))
+
+    assert result == [
+        [(2, "one@example.com", _HASH, True)],
+        [(4, "three@example.com", _HASH, False)],
+    ]
+    assert (stats.read, stats.rejected) == (4, 2)
+
+
+def test_read_records_ndjson_reports_unparsable_lines() -> None:
+    ndjson_input = io.StringIO(
+        f'{{"email": "one@example.com", "password_hash": "{_HASH}"}}\n\n{{broken\n'
+    )
+
+    records = list(read_records(ndjson_input, "ndjson"))
+
+    assert records[1] == (3, None)
+    assert parse_record(*records[0]) == (1, "one@example.com", _HASH, False)
+    with pytest.raises(InvalidRecord):
+        parse_record(*records[1])
+    with pytest.raises(InvalidRecord):
+        parse_record(5, {"email": "one@example.com", "password_hash": _HASH, "is_active": "?"})
+
+
+@pytest.mark.asyncio
+async def test_import_batch_issues_codes_for_inactive_users(mocker) -> None:
+    users = mocker.Mock()
+    users.transaction.return_value.__aenter__ = mocker.AsyncMock()
+    users.transaction.return_value.__aexit__ = mocker.AsyncMock(return_value=False)
+    users.import_users = mocker.AsyncMock(
+        return_value=[
+            {"email": "new@example.com", "is_active": False},
+            {"email": "old@example.com", "is_active": True},
+        ]
+    )
+    codes = mocker.Mock()
+    codes.create_codes = mocker.AsyncMock()
+    rows = [(1, "new@example.com", _HASH, False), (2, "old@example.com", _HASH, True)]
+
+    inserted, messages = await import_batch(users, codes, rows, code_ttl_seconds=3600)
+
+    assert inserted == 2
+    issued = codes.create_codes.await_args.args[0]
+    assert [email for email, _ in issued] == ["new@example.com"]
+    assert messages == [{"email": "new@example.com", "code": issued[0][1], "ttl_seconds": 3600}]
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import argparse
+import json
+
+import httpx
+import pytest
+
+from app.scripts.loadtest import LoadTest, Recorder, extract_activation_code
+from app.utils.email import render_activation_email
+
+
+def _args(**overrides) -> argparse.Namespace:
+    values = {
+        "rate": 0.0,
+        "concurrency": 1,
+        "duration": 0.0,
+        "resend_ratio": 1.0,
+        "activate_ratio": 1.0,
+        "invalid_code_ratio": 0.0,
+        "code_timeout": 1.0,
+    }
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+def test_extract_activation_code_reads_rendered_email() -> None:
+    _, body = render_activation_email("0427", 60)
+
+    assert extract_activation_code(body) == "0427"
+
+
+def test_recorder_reports_percentiles_and_error_breakdown() -> None:
+    recorder = Recorder()
+    for index in range(100):
+        recorder.record("/auth/resend", 202, (index + 1) / 1000)
+    recorder.record("/auth/resend", 429, 0.001)
+    recorder.record("/auth/resend", "ConnectError", 0.001)
+    recorder.stop()
+
+    report = recorder.report()["routes"]["/auth/resend"]
+
+    assert report["count"] == 102
+    assert report["latency_ms"]["max"] == 100.0
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["p95"] <= report["latency_ms"]["p99"]
+    assert report["outcomes"] == {"202": 100, "429": 1, "ConnectError": 1}
+    assert report["errors"] == 2
+    assert report["rate_limited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_user_journey_activates_with_code_from_latest_email() -> None:
+    inbox: dict[str, dict] = {}
+    activated: list[str] = []
+
+    def deliver(email: str, code: str) -> None:
+        count = inbox.get(email, {}).get("count", 0) + 1
+        inbox[email] = {"body": render_activation_email(code, 60)[1], "count": count}
+
+    def api(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/auth/register":
+            email = json.loads(request.content)["email"]
+            deliver(email, "1111")
+            return httpx.Response(201, json={"token": email})
+        email = request.headers["Authorization"].removeprefix("Bearer ")
+        if request.url.path == "/auth/resend":
+            deliver(email, "2222")
+            return httpx.Response(202)
+        activated.append(json.loads(request.content)["code"])
+        return httpx.Response(200)
+
+    def mock_email(request: httpx.Request) -> httpx.Response:
+        message = inbox.get(request.url.path.removeprefix("/inbox/"))
+        return httpx.Response(200, json=message) if message else httpx.Response(404)
+
+    recorder = Recorder()
+    async with (
+        httpx.AsyncClient(transport=httpx.MockTransport(api), base_url="http://api") as client,
+        httpx.AsyncClient(
+            transport=httpx.MockTransport(mock_email), base_url="http://mock"
+        ) as mock_client,
+    ):
+        await LoadTest(client, mock_client, recorder, _args()).user_journey()
+
+    assert activated == ["2222"]
+    routes = recorder.report()["routes"]
+    assert set(routes) == {"/auth/register", "/auth/resend", "/auth/activate", "email"}
+    assert routes["email"]["outcomes"] == {"delivered": 1}
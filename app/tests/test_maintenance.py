@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from psycopg import errors
+
+from app.tasks.maintenance import maintain_partitions, purge_expired_codes
+
+
+@pytest.mark.asyncio
+async def test_purge_deletes_in_batches_until_a_short_batch(mocker) -> None:
+    codes = mocker.Mock()
+    codes.purge_expired = mocker.AsyncMock(side_effect=[100, 100, 42])
+
+    purged = await purge_expired_codes(codes, retention_seconds=3600, batch_size=100)
+
+    assert purged == 242
+    assert codes.purge_expired.await_count == 3
+    cutoffs = {call.kwargs["expired_before"] for call in codes.purge_expired.await_args_list}
+    assert len(cutoffs) == 1
+    assert {call.kwargs["limit"] for call in codes.purge_expired.await_args_list} == {100}
+
+
+@pytest.mark.asyncio
+async def test_partitions_are_created_ahead_and_expired_ones_dropped(mocker) -> None:
+    today = datetime.now(timezone.utc).date()
+    days = [today - timedelta(days=offset) for offset in (4, 3, 1, 0)]
+    codes = mocker.Mock()
+    codes.list_partitions = mocker.AsyncMock(return_value=days)
+    codes.create_partition = mocker.AsyncMock()
+    codes.drop_partition = mocker.AsyncMock(side_effect=[True, False])
+
+    created, dropped = await maintain_partitions(
+        codes, days_ahead=2, retention_seconds=24 * 60 * 60, today=today
+    )
+
+    assert created == [today + timedelta(days=1), today + timedelta(days=2)]
+    assert dropped == [days[0]]
+    assert [call.args[0] for call in codes.drop_partition.await_args_list] == days[:2]
+
+
+@pytest.mark.asyncio
+async def test_partition_lock_timeouts_skip_only_that_partition(mocker) -> None:
+    today = datetime.now(timezone.utc).date()
+    days = [today - timedelta(days=offset) for offset in (4, 3)]
+    codes = mocker.Mock()
+    codes.list_partitions = mocker.AsyncMock(return_value=days)
+    codes.create_partition = mocker.AsyncMock(side_effect=[errors.LockNotAvailable(), None])
+    codes.drop_partition = mocker.AsyncMock(side_effect=[errors.LockNotAvailable(), True])
+
+    created, dropped = await maintain_partitions(
+        codes, days_ahead=1, retention_seconds=24 * 60 * 60, today=today
+    )
+
+    assert created == [today + timedelta(days=1)]
+    assert dropped == [days[1]]
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI, HTTPException
+
+from app.api.routing import TimedRoute
+from app.core.metrics import (
+    REGISTRY,
+    CallbackGauge,
+    Counter,
+    Histogram,
+    Registry,
+    start_http_server,
+)
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    registry = Registry()
+    histogram = Histogram(
+        "job_seconds", "Job time.", ("queue",), buckets=(0.1, 1.0), registry=registry
+    )
+    child = histogram.labels("default")
+    for value in (0.05, 0.1, 0.5, 3.0):
+        child.observe(value)
+
+    lines = registry.render().splitlines()
+
+    assert lines[:2] == ["# HELP job_seconds Job time.", "# TYPE job_seconds histogram"]
+    assert 'job_seconds_bucket{queue="default",le="0.1"} 2' in lines
+    assert 'job_seconds_bucket{queue="default",le="1"} 3' in lines
+    assert 'job_seconds_bucket{queue="default",le="+Inf"} 4' in lines
+    assert 'job_seconds_count{queue="default"} 4' in lines
+    assert 'job_seconds_sum{queue="default"} 3.65' in lines
+
+
+def test_counter_and_gauge_render_labels() -> None:
+    registry = Registry()
+    counter = Counter("events_total", "Events.", ("kind",), registry=registry)
+    counter.labels('say "hi"\n').inc()
+    counter.labels('say "hi"\n').inc(2)
+    CallbackGauge("pool", "Pool.", ("stat",), callback=lambda: [(("size",), 4)], registry=registry)
+
+    text = registry.render()
+
+    assert 'events_total{kind="say \\"hi\\"\\n"} 3' in text
+    assert 'pool{stat="size"} 4' in text
+    with pytest.raises(ValueError):
+        counter.labels()
+    with pytest.raises(ValueError):
+        Counter("events_total", "Duplicate.", registry=registry)
+
+
+@pytest.mark.asyncio
+async def test_timed_route_records_status_codes() -> None:
+    router = APIRouter(prefix="/timed-test", route_class=TimedRoute)
+
+    @router.get("/ok")
+    async def ok() -> dict[str, str]:
+        return {}
+
+    @router.get("/missing")
+    async def missing() -> dict[str, str]:
+        raise HTTPException(status_code=404)
+
+    app = FastAPI()
+    app.include_router(router)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        await client.get("/timed-test/ok")
+        await client.get("/timed-test/ok")
+        await client.get("/timed-test/missing")
+    async with _metrics_client() as client:
+        metrics_text = (await client.get("/metrics")).text
+
+    assert 'http_requests_total{method="GET",route="/timed-test/ok",status="200"} 2' in metrics_text
+    assert (
+        'http_requests_total{method="GET",route="/timed-test/missing",status="404"} 1'
+        in metrics_text
+    )
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/timed-test/ok"} 2' in metrics_text
+    )
+
+
+def test_http_server_serves_the_process_registry() -> None:
+    Counter("metrics_server_test_total", "Test counter.").inc(3)
+    server = start_http_server(0, host="127.0.0.1")
+    try:
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        response = httpx.get(f"{base_url}/metrics")
+        missing = httpx.get(f"{base_url}/other")
+    finally:
+        server.shutdown()
+        server.server_close()
+        REGISTRY.unregister("metrics_server_test_total")
+
+    assert response.status_code == 200
+    assert "metrics_server_test_total 3" in response.text.splitlines()
+    assert missing.status_code == 404
+
+
+def _metrics_client() -> httpx.AsyncClient:
+    from app.api.routes import metrics
+
+    app = FastAPI()
+    app.include_router(metrics.router)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
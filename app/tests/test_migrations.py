@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import os
+
+import psycopg
+import pytest
+import pytest_asyncio
+
+from app.scripts.run_migrations import Migration, MigrationError, apply_migrations
+
+
+def test_no_transaction_migrations_are_split_into_statements() -> None:
+    migration = Migration(
+        "900_indexes.sql",
+        "-- migrate:no-transaction\n"
+        "-- Build online.\n"
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_a ON t (a);\n"
+        "\n"
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_b\n"
+        "    ON t (b);\n"
+        "-- trailing comment\n",
+    )
+
+    assert migration.transactional is False
+    assert migration.statements() == [
+        "-- migrate:no-transaction\n-- Build online.\n"
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_a ON t (a)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_b\n    ON t (b)",
+    ]
+    assert Migration("901_table.sql", "CREATE TABLE t (a INT);").transactional is True
+
+
+@pytest_asyncio.fixture
+async def migration_conn():
+    database_url = os.getenv("TEST_DATABASE_URL")
+    if not database_url:
+        pytest.skip("TEST_DATABASE_URL environment variable is not set")
+
+    connection = await psycopg.AsyncConnection.connect(database_url, autocommit=True)
+    yield connection
+    try:
+        await connection.execute("DROP TABLE IF EXISTS migration_test")
+        await connection.execute(
+            "DELETE FROM schema_migrations WHERE filename = ANY(%s)",
+            (["900_test_table.sql", "901_test_index.sql"],),
+        )
+    finally:
+        await connection.close()
+
+
+@pytest.mark.asyncio
+async def test_applied_migrations_are_recorded_and_skipped(migration_conn) -> None:
+    migrations = [
+        Migration("900_test_table.sql", "CREATE TABLE migration_test (a INT, b INT);"),
+        Migration(
+            "901_test_index.sql",
+            "-- migrate:no-transaction\n"
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_migration_test_a ON migration_test (a);\n"
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_migration_test_b ON migration_test (b);\n",
+        ),
+    ]
+
+    assert await apply_migrations(migration_conn, migrations) == [
+        "900_test_table.sql",
+        "901_test_index.sql",
+    ]
+    assert await apply_migrations(migration_conn, migrations) == []
+
+    cursor = await migration_conn.execute(
+        "SELECT indexname FROM pg_indexes WHERE tablename = 'migration_test' ORDER BY indexname"
+    )
+    assert [row[0] for row in await cursor.fetchall()] == [
+        "idx_migration_test_a",
+        "idx_migration_test_b",
+    ]
+
+    changed = [Migration("900_test_table.sql", "CREATE TABLE migration_test (a BIGINT);")]
+    with pytest.raises(MigrationError):
+        await apply_migrations(migration_conn, changed)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import threading
+
+import httpx
+import pytest
+
+from mock_email_server import (
+    EmailRequestHandler,
+    Inbox,
+    MockBehaviour,
+    MockEmailServer,
+    Stats,
+)
+
+
+@pytest.fixture
+def mock_email(request: pytest.FixtureRequest):
+    """A running mock email server; indirect parametrization passes the MockBehaviour kwargs."""
+    handler = type(
+        "TestHandler",
+        (EmailRequestHandler,),
+        {
+            "behaviour": MockBehaviour(**getattr(request, "param", {})),
+            "stats": Stats(),
+            "inbox": Inbox(),
+        },
+    )
+    server = MockEmailServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = httpx.Client(base_url=f"http://127.0.0.1:{server.server_address[1]}", timeout=5)
+    yield client
+    client.close()
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.mark.parametrize("mock_email", [{"latency": "fixed:50"}], indirect=True)
+def test_injected_latency_is_reported_apart_from_handling_time(mock_email) -> None:
+    response = mock_email.post("/send", json={"to": "a@example.com", "body": "1234"})
+
+    assert response.status_code == 200
+    assert mock_email.get("/inbox/a@example.com").json()["body"] == "1234"
+    stats = mock_email.get("/stats").json()
+    assert stats["delivered"] == 1
+    assert stats["injected_delay_ms"]["p50"] >= 50
+    assert stats["handling_ms"]["p50"] < 50
+
+
+@pytest.mark.parametrize("mock_email", [{"error_rate": 1.0}], indirect=True)
+def test_injected_failures_are_counted(mock_email) -> None:
+    single = mock_email.post("/send", json={"to": "a@example.com"})
+    bulk = mock_email.post(
+        "/send/bulk", json={"messages": [{"to": "b@example.com"}, {"to": "c@example.com"}]}
+    )
+
+    assert single.status_code == 500
+    assert bulk.status_code == 200
+    assert [result["status"] for result in bulk.json()["results"]] == ["error", "error"]
+    stats = mock_email.get("/stats").json()
+    assert (stats["requests"], stats["received"], stats["rejected"]) == (2, 3, 3)
+    assert stats["delivered"] == 0
+    assert stats["injected_delay_ms"] == {"p50": 0.0, "p99": 0.0}
+
+
+@pytest.mark.parametrize("mock_email", [{"throttle_rate": 1.0, "retry_after": 3}], indirect=True)
+def test_throttled_requests_carry_retry_after_until_stats_reset(mock_email) -> None:
+    response = mock_email.post("/send", json={"to": "a@example.com"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+    assert mock_email.get("/inbox/a@example.com").status_code == 404
+    assert mock_email.get("/stats").json()["throttled"] == 1
+
+    assert mock_email.delete("/stats").status_code == 200
+    stats = mock_email.get("/stats").json()
+    assert (stats["requests"], stats["throttled"]) == (0, 0)
+    assert stats["handling_ms"] == {"p50": None, "p99": None}
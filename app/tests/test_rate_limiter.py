@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import pytest
+
+from app.api.deps import get_rate_limiter
+from app.core import constants
+from app.services.rate_limiter import RateLimiter, RateLimitExceeded
+
+
+@pytest.mark.asyncio
+async def test_resend_allowed_runs_one_script(redis_client) -> None:
+    limiter = RateLimiter(redis_client)
+    limiter._check_resend.return_value = [0, 0]
+
+    await limiter.ensure_resend_allowed("User@Example.com")
+
+    limiter._check_resend.assert_awaited_once_with(
+        keys=["resend:minute:user@example.com", "resend:daily:user@example.com"],
+        args=[
+            constants.RESEND_PER_MINUTE_LIMIT,
+            constants.RESEND_MINUTE_WINDOW_SECONDS,
+            constants.RESEND_DAILY_LIMIT,
+        ],
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("result", "retry_after"),
+    [([1, 42], 42), ([2, 3600], 3600), ([2, -1], None)],
+)
+async def test_resend_denied_maps_script_result(redis_client, result, retry_after) -> None:
+    limiter = RateLimiter(redis_client)
+    limiter._check_resend.return_value = result
+
+    with pytest.raises(RateLimitExceeded) as exc:
+        await limiter.ensure_resend_allowed("user@example.com")
+
+    assert exc.value.retry_after == retry_after
+
+
+@pytest.mark.asyncio
+async def test_activation_failure_and_reset_are_single_commands(redis_client) -> None:
+    limiter = RateLimiter(redis_client)
+
+    await limiter.record_activation_failure("user@example.com")
+    await limiter.reset_activation("user@example.com")
+
+    limiter._record_activation_failure.assert_awaited_once_with(
+        keys=["activation:attempts:user@example.com", "activation:lock:user@example.com"],
+        args=[
+            constants.ACTIVATION_ATTEMPT_WINDOW_SECONDS,
+            constants.ACTIVATION_ATTEMPT_LIMIT,
+            constants.ACTIVATION_LOCK_SECONDS,
+        ],
+    )
+    redis_client.delete.assert_awaited_once_with(
+        "activation:attempts:user@example.com", "activation:lock:user@example.com"
+    )
+
+
+@pytest.mark.asyncio
+async def test_resend_scripts_reserve_release_and_count(fake_redis) -> None:
+    limiter = RateLimiter(fake_redis)
+
+    await limiter.ensure_resend_allowed("user@example.com")
+    with pytest.raises(RateLimitExceeded) as exc:
+        await limiter.ensure_resend_allowed("user@example.com")
+    assert exc.value.retry_after == constants.RESEND_MINUTE_WINDOW_SECONDS
+
+    await limiter.release_resend("user@example.com")
+    await limiter.ensure_resend_allowed("user@example.com")
+    for _ in range(constants.RESEND_DAILY_LIMIT):
+        await limiter.record_resend("user@example.com")
+    await limiter.release_resend("user@example.com")
+
+    with pytest.raises(RateLimitExceeded) as exc:
+        await limiter.ensure_resend_allowed("user@example.com")
+    assert exc.value.retry_after == constants.RESEND_DAILY_WINDOW_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_activation_failure_script_locks_after_the_limit(fake_redis) -> None:
+    limiter = RateLimiter(fake_redis)
+
+    for _ in range(constants.ACTIVATION_ATTEMPT_LIMIT - 1):
+        await limiter.record_activation_failure("user@example.com")
+    await limiter.ensure_activation_allowed("user@example.com")
+
+    await limiter.record_activation_failure("user@example.com")
+    with pytest.raises(RateLimitExceeded) as exc:
+        await limiter.ensure_activation_allowed("user@example.com")
+    assert exc.value.retry_after == constants.ACTIVATION_LOCK_SECONDS
+    assert await fake_redis.exists("activation:attempts:user@example.com") == 0
+
+    await limiter.reset_activation("user@example.com")
+    await limiter.ensure_activation_allowed("user@example.com")
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_dependency_is_built_once_per_client(redis_client) -> None:
+    limiters = [await get_rate_limiter(redis_client) for _ in range(2)]
+
+    assert limiters[0] is limiters[1]
+    assert redis_client.register_script.call_count == 3
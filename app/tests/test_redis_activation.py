@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from pytest_mock import MockerFixture
+
+from app.api.deps import get_activation_repository
+from app.repositories.redis_activation import RedisActivationRepository
+from app.services.user import UserService
+
+
+@pytest.mark.asyncio
+async def test_create_code_sets_code_and_latest_keys_with_ttl(fake_redis) -> None:
+    codes = RedisActivationRepository(fake_redis)
+
+    await codes.create_code("User@Example.com", "0427", ttl_seconds=60)
+
+    for key in (
+        "activation:code:{user@example.com}:0427",
+        "activation:code:{user@example.com}:latest",
+    ):
+        assert 0 < await fake_redis.ttl(key) <= 60
+    latest = await codes.latest_code("user@example.com")
+    assert latest["id"] == 1
+    assert latest["code"] == "0427"
+    assert latest["used_at"] is None
+    assert (latest["expires_at"] - latest["created_at"]).total_seconds() == 60
+
+
+@pytest.mark.asyncio
+async def test_codes_are_single_use(fake_redis) -> None:
+    codes = RedisActivationRepository(fake_redis)
+    await codes.create_code("user@example.com", "0427", ttl_seconds=60)
+
+    results = await asyncio.gather(
+        *(codes.validate_code("user@example.com", "0427") for _ in range(5))
+    )
+
+    assert sorted(results) == [False] * 4 + [True]
+    assert await codes.validate_code("user@example.com", "9999") is False
+    assert (await codes.latest_code("user@example.com"))["used_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_expired_codes_no_longer_validate(fake_redis) -> None:
+    codes = RedisActivationRepository(fake_redis)
+    await codes.create_code("user@example.com", "0427", ttl_seconds=1)
+    await codes.create_code("user@example.com", "0428", ttl_seconds=60)
+
+    await asyncio.sleep(1.1)
+
+    assert await codes.validate_code("user@example.com", "0427") is False
+    assert await codes.validate_code("user@example.com", "0428") is True
+
+
+@pytest.mark.asyncio
+async def test_latest_code_is_the_newest_issued(fake_redis) -> None:
+    codes = RedisActivationRepository(fake_redis)
+    await codes.create_code("user@example.com", "1111", ttl_seconds=60)
+    await codes.create_codes(
+        [("user@example.com", "2222"), ("other@example.com", "3333")], ttl_seconds=60
+    )
+
+    assert await codes.validate_code("user@example.com", "1111") is True
+    latest = await codes.latest_code("user@example.com")
+    assert (latest["id"], latest["code"], latest["used_at"]) == (2, "2222", None)
+    assert (await codes.latest_code("other@example.com"))["id"] == 1
+    assert await codes.latest_code("nobody@example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_service_keeps_codes_out_of_postgres(
+    mocker: MockerFixture, fake_redis, settings
+) -> None:
+    @asynccontextmanager
+    async def pipeline():
+        yield
+
+    users = mocker.Mock()
+    users.pipeline = pipeline
+    users.register_user = mocker.AsyncMock(
+        return_value={"id": 1, "created": True, "is_active": False}
+    )
+    users.activate_user = mocker.AsyncMock()
+    email_service = mocker.Mock(transactional=False)
+    email_service.send_activation = mocker.AsyncMock()
+    mocker.patch("app.services.user.hash_password_async", mocker.AsyncMock(return_value="x"))
+    codes = RedisActivationRepository(fake_redis)
+    service = UserService(users, codes, email_service, settings)
+
+    result = await service.register("user@example.com", "Passw0rd!1")
+
+    assert users.register_user.await_args.kwargs["code"] is None
+    assert (await codes.latest_code("user@example.com"))["code"] == result.code
+    assert await service.activate("user@example.com", result.code) is True
+    assert await service.activate("user@example.com", result.code) is False
+    users.activate_user.assert_awaited_once_with("user@example.com")
+
+
+@pytest.mark.asyncio
+async def test_activation_repository_dependency_is_built_once_per_client(
+    redis_client, settings
+) -> None:
+    settings = settings.model_copy(update={"activation_code_store": "redis"})
+
+    stores = [await get_activation_repository(None, redis_client, settings) for _ in range(2)]
+
+    assert stores[0] is stores[1]
+    assert redis_client.register_script.call_count == 2
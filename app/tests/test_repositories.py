@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from datetime import date, datetime, time, timedelta, timezone
+
 import pytest
+from psycopg_pool import AsyncConnectionPool
 
 from app.repositories.activation import ActivationRepository
 from app.repositories.user import UserRepository
@@ -11,11 +15,11 @@ from app.utils.code_generator import generate_code
 async def test_create_and_fetch_user(db_conn) -> None:
     repo = UserRepository(db_conn)
 
-    user_id = await repo.create_user("jane@example.com", "hashed-password")
+    registered = await repo.register_user("jane@example.com", "hashed-password")
     user = await repo.get_user_by_email("jane@example.com")
 
     assert user is not None
-    assert user["id"] == user_id
+    assert user["id"] == registered["id"]
     assert user["is_active"] is False
 
 
@@ -24,7 +28,7 @@ async def test_create_and_validate_activation_code(db_conn) -> None:
     user_repo = UserRepository(db_conn)
     activation_repo = ActivationRepository(db_conn)
 
-    await user_repo.create_user("john@example.com", "hashed")
+    await user_repo.register_user("john@example.com", "hashed")
 
     code = generate_code()
     await activation_repo.create_code("john@example.com", code, ttl_seconds=60)
@@ -41,3 +45,304 @@ async def test_activation_code_expires(db_conn) -> None:
     await activation_repo.create_code("expired@example.com", "0001", ttl_seconds=0)
 
     assert await activation_repo.validate_code("expired@example.com", "0001") is False
+
+
+@pytest.mark.asyncio
+async def test_purge_expired_deletes_old_codes_in_batches(db_conn) -> None:
+    activation_repo = ActivationRepository(db_conn)
+    for code in ("0001", "0002", "0003"):
+        await activation_repo.create_code("purge@example.com", code, ttl_seconds=-120)
+    await activation_repo.create_code("purge@example.com", "0004", ttl_seconds=60)
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=60)
+
+    assert await activation_repo.purge_expired(expired_before=cutoff, limit=2) == 2
+    assert await activation_repo.purge_expired(expired_before=cutoff, limit=2) == 1
+    assert await activation_repo.purge_expired(expired_before=cutoff, limit=2) == 0
+    assert (await activation_repo.latest_code("purge@example.com"))["code"] == "0004"
+
+
+@pytest.mark.asyncio
+async def test_partitions_are_created_and_dropped_once_expired(db_conn) -> None:
+    activation_repo = ActivationRepository(db_conn)
+    day = datetime.now(timezone.utc).date() + timedelta(days=30)
+
+    await activation_repo.create_partition(day)
+    await activation_repo.create_partition(day)
+    assert day in await activation_repo.list_partitions()
+
+    retained_until = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    await db_conn.execute(
+        "INSERT INTO activation_codes (email, code, expires_at, created_at) "
+        "VALUES ('future@example.com', '1234', %(expires_at)s, %(created_at)s)",
+        {"expires_at": retained_until + timedelta(hours=2), "created_at": retained_until},
+    )
+    await db_conn.commit()
+
+    assert await activation_repo.drop_partition(day, expired_before=retained_until) is False
+    expired_before = retained_until + timedelta(days=2)
+    assert await activation_repo.drop_partition(day, expired_before=expired_before) is True
+    assert day not in await activation_repo.list_partitions()
+
+
+@pytest.mark.asyncio
+async def test_transaction_rolls_back_every_repository_on_error(db_conn) -> None:
+    user_repo = UserRepository(db_conn)
+    activation_repo = ActivationRepository(db_conn)
+
+    with pytest.raises(RuntimeError):
+        async with user_repo.transaction():
+            await user_repo.register_user("partial@example.com", "hashed")
+            await activation_repo.create_code("partial@example.com", "1234", ttl_seconds=60)
+            raise RuntimeError("second write failed")
+
+    assert await user_repo.get_user_by_email("partial@example.com") is None
+    assert await activation_repo.latest_code("partial@example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_transaction_commits_once(db_conn, mocker) -> None:
+    user_repo = UserRepository(db_conn)
+    activation_repo = ActivationRepository(db_conn)
+    commit = mocker.spy(db_conn, "commit")
+
+    async with user_repo.transaction():
+        await user_repo.register_user("atomic@example.com", "hashed")
+        async with activation_repo.transaction():
+            await activation_repo.create_code("atomic@example.com", "1234", ttl_seconds=60)
+
+    assert commit.await_count == 1
+    assert await activation_repo.validate_code("atomic@example.com", "1234") is True
+
+
+@pytest.fixture
+def fake_pool(request: pytest.FixtureRequest, mocker):
+    """A pool whose connections record their statements and commits.
+
+    Indirect parametrization sets the connections' ``prepare_threshold`` (default 5).
+    """
+    prepare_threshold = getattr(request, "param", 5)
+    connections = []
+
+    @asynccontextmanager
+    async def connection():
+        conn = mocker.MagicMock(name=f"connection{len(connections)}")
+        conn.prepare_threshold = prepare_threshold
+        conn.commit = mocker.AsyncMock()
+        conn.rollback = mocker.AsyncMock()
+        cursor = mocker.MagicMock()
+        cursor.execute = mocker.AsyncMock()
+        cursor.fetchone = mocker.AsyncMock(return_value={"id": 1})
+        cursor.__aenter__ = mocker.AsyncMock(return_value=cursor)
+        cursor.__aexit__ = mocker.AsyncMock(return_value=False)
+        conn.cursor.return_value = cursor
+        conn.pipelines = []
+
+        @asynccontextmanager
+        async def pipeline():
+            conn.pipelines.append(conn.cursor.call_count)
+            yield
+
+        conn.pipeline = pipeline
+        connections.append(conn)
+        yield conn
+
+    pool = mocker.MagicMock(spec=AsyncConnectionPool)
+    pool.connection = connection
+    return pool, connections
+
+
+@pytest.mark.asyncio
+async def test_pool_connection_is_held_per_statement_or_unit_of_work(fake_pool) -> None:
+    pool, connections = fake_pool
+    user_repo = UserRepository(pool)
+    activation_repo = ActivationRepository(pool)
+
+    await user_repo.get_user_by_email("solo@example.com")
+    await activation_repo.create_code("solo@example.com", "1234", ttl_seconds=60)
+    assert len(connections) == 2
+    connections[0].commit.assert_not_awaited()
+    connections[1].commit.assert_awaited_once()
+
+    async with user_repo.transaction():
+        await user_repo.register_user("grouped@example.com", "hashed")
+        await activation_repo.create_code("grouped@example.com", "1234", ttl_seconds=60)
+        assert user_repo.in_transaction and activation_repo.in_transaction
+
+    assert len(connections) == 3
+    assert connections[2].cursor.call_count == 2
+    connections[2].commit.assert_awaited_once()
+    assert not user_repo.in_transaction
+
+
+@pytest.mark.asyncio
+async def test_after_commit_callbacks_run_once_the_unit_of_work_commits(fake_pool) -> None:
+    pool, connections = fake_pool
+    user_repo = UserRepository(pool)
+    calls = []
+
+    async with user_repo.transaction():
+        user_repo.after_commit(lambda: calls.append(connections[0].commit.await_count))
+        assert calls == []
+    assert calls == [1]
+
+    with pytest.raises(RuntimeError):
+        async with user_repo.transaction():
+            user_repo.after_commit(lambda: calls.append("rolled back"))
+            raise RuntimeError
+    user_repo.after_commit(lambda: calls.append("no unit of work"))
+    assert calls == [1, "no unit of work"]
+
+
+@pytest.mark.asyncio
+async def test_activation_invalidates_cached_credentials_once_committed(fake_pool, mocker) -> None:
+    pool, _ = fake_pool
+    cache = mocker.patch("app.repositories.user.get_credential_cache").return_value
+    user_repo = UserRepository(pool)
+
+    async with user_repo.transaction():
+        await user_repo.activate_user("grouped@example.com")
+        cache.invalidate.assert_not_called()
+    cache.invalidate.assert_called_once_with("grouped@example.com")
+
+    assert await user_repo.activate_with_code("coded@example.com", "1234") is True
+    cache.invalidate.assert_called_with("coded@example.com")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("fake_pool", "prepare"), [(5, True), (None, None)], indirect=["fake_pool"]
+)
+async def test_statements_are_prepared_unless_disabled(fake_pool, prepare) -> None:
+    pool, connections = fake_pool
+
+    await UserRepository(pool).get_user_by_email("prepared@example.com")
+
+    execute = connections[0].cursor.return_value.execute
+    assert execute.await_args.kwargs == {"prepare": prepare}
+
+
+@pytest.mark.asyncio
+async def test_create_partition_sets_lock_timeout_first(fake_pool) -> None:
+    pool, connections = fake_pool
+
+    await ActivationRepository(pool).create_partition(date(2030, 1, 1))
+
+    statements = [
+        call.args[0] for call in connections[0].cursor.return_value.execute.await_args_list
+    ]
+    assert statements[0] == "SET LOCAL lock_timeout = '5s'"
+    assert len(statements) == 2
+    connections[0].commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_runs_unit_of_work_in_pipeline_mode(fake_pool) -> None:
+    pool, connections = fake_pool
+    user_repo = UserRepository(pool)
+    activation_repo = ActivationRepository(pool)
+
+    async with user_repo.pipeline():
+        await user_repo.get_user_by_email("piped@example.com")
+        async with activation_repo.pipeline():
+            await activation_repo.create_code("piped@example.com", "1234", ttl_seconds=60)
+
+    assert len(connections) == 1
+    assert connections[0].pipelines == [0, 1]
+    connections[0].commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_rolls_back_queued_statements_on_error(db_conn) -> None:
+    user_repo = UserRepository(db_conn)
+    activation_repo = ActivationRepository(db_conn)
+
+    with pytest.raises(RuntimeError):
+        async with user_repo.pipeline():
+            await activation_repo.create_code("piped@example.com", "1234", ttl_seconds=60)
+            await user_repo.register_user("piped@example.com", "hashed")
+            raise RuntimeError("abort")
+
+    assert await user_repo.get_user_by_email("piped@example.com") is None
+    assert await activation_repo.latest_code("piped@example.com") is None
+
+    async with user_repo.pipeline():
+        await user_repo.register_user("piped@example.com", "hashed")
+        await activation_repo.create_code("piped@example.com", "1234", ttl_seconds=60)
+
+    assert (await activation_repo.latest_code("piped@example.com"))["code"] == "1234"
+
+
+@pytest.mark.asyncio
+async def test_import_users_copies_rows_and_skips_existing_emails(db_conn) -> None:
+    user_repo = UserRepository(db_conn)
+    activation_repo = ActivationRepository(db_conn)
+    await user_repo.register_user("existing@example.com", "hashed")
+
+    inserted = await user_repo.import_users(
+        [
+            (1, "imported@example.com", "first", False),
+            (2, "existing@example.com", "other", True),
+            (3, "imported@example.com", "second", True),
+        ]
+    )
+    await activation_repo.create_codes([("imported@example.com", "4321")], ttl_seconds=60)
+
+    assert inserted == [{"email": "imported@example.com", "is_active": False}]
+    assert (await user_repo.get_user_by_email("imported@example.com"))["password_hash"] == "first"
+    assert (await activation_repo.latest_code("imported@example.com"))["code"] == "4321"
+
+
+@pytest.mark.asyncio
+async def test_register_user_reports_existing_state(db_conn) -> None:
+    user_repo = UserRepository(db_conn)
+
+    created = await user_repo.register_user("new@example.com", "hashed")
+    assert created is not None and created["created"] is True
+
+    again = await user_repo.register_user("new@example.com", "hashed")
+    assert again == {"id": created["id"], "created": False, "is_active": False}
+
+    await user_repo.activate_user("new@example.com")
+    active = await user_repo.register_user("new@example.com", "hashed")
+    assert active is not None and active["is_active"] is True
+
+
+@pytest.mark.asyncio
+async def test_register_and_activate_with_codes_in_one_statement(db_conn) -> None:
+    user_repo = UserRepository(db_conn)
+    activation_repo = ActivationRepository(db_conn)
+
+    created = await user_repo.register_user("coded@example.com", "hashed", code="1234")
+    assert created is not None and created["created"] is True
+    await user_repo.register_user("coded@example.com", "hashed", code="5678")
+    assert (await activation_repo.latest_code("coded@example.com"))["code"] == "1234"
+
+    rows = await user_repo.register_users(
+        [("batch@example.com", "hashed"), ("coded@example.com", "hashed")],
+        codes=["4321", "8765"],
+    )
+    assert {row["email"]: row["created"] for row in rows} == {
+        "batch@example.com": True,
+        "coded@example.com": False,
+    }
+    assert (await activation_repo.latest_code("batch@example.com"))["code"] == "4321"
+    assert (await activation_repo.latest_code("coded@example.com"))["code"] == "1234"
+
+    assert await user_repo.activate_with_code("coded@example.com", "5678") is False
+    assert await user_repo.activate_with_code("coded@example.com", "1234") is True
+    assert await user_repo.activate_with_code("coded@example.com", "1234") is False
+    assert (await user_repo.get_user_by_email("coded@example.com"))["is_active"] is True
+
+
+@pytest.mark.asyncio
+async def test_register_users_inserts_new_emails_and_reports_existing(db_conn) -> None:
+    user_repo = UserRepository(db_conn)
+    await user_repo.register_user("pending@example.com", "hashed")
+
+    rows = await user_repo.register_users(
+        [("new@example.com", "hashed"), ("pending@example.com", "hashed")]
+    )
+
+    by_email = {row["email"]: row for row in rows}
+    assert by_email["new@example.com"]["created"] is True
+    assert by_email["pending@example.com"]["created"] is False
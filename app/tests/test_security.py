@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from app.core.credential_cache import CredentialCache
+from app.core.security import (
+    PasswordHasherBusy,
+    PasswordHasherPool,
+    create_session_token,
+    hash_password,
+    hash_passwords_async,
+    read_session_token,
+    verify_password,
+)
+
+
+@pytest.fixture
+def hasher_pool():
+    pool = PasswordHasherPool(max_workers=1, max_pending=1)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hasher_pool_hashes_and_verifies(hasher_pool: PasswordHasherPool) -> None:
+    hashed = await hasher_pool.run(hash_password, "Passw0rd!1")
+
+    assert await hasher_pool.run(verify_password, "Passw0rd!1", hashed) is True
+    assert await hasher_pool.run(verify_password, "wrong", hashed) is False
+
+
+@pytest.mark.asyncio
+async def test_hasher_pool_rejects_work_beyond_queue_limit(
+    hasher_pool: PasswordHasherPool,
+) -> None:
+    release = threading.Event()
+
+    running = asyncio.create_task(hasher_pool.run(release.wait, 5))
+    queued = asyncio.create_task(hasher_pool.run(release.wait, 5))
+    await asyncio.sleep(0)
+
+    stats = hasher_pool.stats()
+    assert stats["running"] == 1
+    assert stats["queued"] == 1
+    assert stats["utilisation"] == 1.0
+
+    with pytest.raises(PasswordHasherBusy):
+        await hasher_pool.run(release.wait, 5)
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert hasher_pool.stats()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_hash_passwords_async_leaves_workers_for_single_requests(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    pool = PasswordHasherPool(max_workers=4, max_pending=0)
+    monkeypatch.setattr("app.core.security.get_password_hasher", lambda: pool)
+    passwords = [f"Passw0rd!{index}" for index in range(6)]
+    peak = 0
+
+    def busy(_: float) -> None:
+        nonlocal peak
+        peak = max(peak, pool.stats()["running"])
+
+    batch = asyncio.create_task(hash_passwords_async(passwords))
+    while pool.stats()["running"] < 2:
+        await asyncio.sleep(0.001)
+    await pool.run(busy, 0)
+    hashed = await batch
+    pool.shutdown()
+
+    assert peak <= 3
+    assert [verify_password(p, h) for p, h in zip(passwords, hashed, strict=True)] == [True] * 6
+
+
+def test_credential_cache_requires_matching_password() -> None:
+    cache = CredentialCache("secret", max_entries=2, ttl_seconds=60)
+    cache.set("alice@example.com", "Passw0rd!1", {"id": 1, "email": "alice@example.com"})
+
+    assert cache.get("alice@example.com", "Passw0rd!1") == {"id": 1, "email": "alice@example.com"}
+    assert cache.get("alice@example.com", "wrong") is None
+    assert cache.get("bob@example.com", "Passw0rd!1") is None
+
+
+def test_credential_cache_evicts_least_recently_used() -> None:
+    cache = CredentialCache("secret", max_entries=2, ttl_seconds=60)
+    cache.set("a@example.com", "pw", {"id": 1})
+    cache.set("b@example.com", "pw", {"id": 2})
+    cache.get("a@example.com", "pw")
+    cache.set("c@example.com", "pw", {"id": 3})
+
+    assert cache.get("b@example.com", "pw") is None
+    assert cache.get("a@example.com", "pw") == {"id": 1}
+    assert cache.get("c@example.com", "pw") == {"id": 3}
+
+
+def test_credential_cache_expires_and_invalidates() -> None:
+    cache = CredentialCache("secret", max_entries=2, ttl_seconds=0)
+    cache.set("a@example.com", "pw", {"id": 1})
+    assert cache.get("a@example.com", "pw") is None
+
+    cache = CredentialCache("secret", max_entries=2, ttl_seconds=60)
+    cache.set("a@example.com", "pw", {"id": 1})
+    cache.invalidate("a@example.com")
+    assert cache.get("a@example.com", "pw") is None
+
+
+def test_session_token_round_trip() -> None:
+    user = {"id": 7, "email": "alice@example.com", "is_active": False}
+    token = create_session_token(user, secret_key="secret", ttl_seconds=60)
+
+    assert read_session_token(token, secret_key="secret") == user
+
+
+def test_session_token_rejects_tampering_and_expiry() -> None:
+    user = {"id": 7, "email": "alice@example.com", "is_active": False}
+    token = create_session_token(user, secret_key="secret", ttl_seconds=60)
+    payload, _, signature = token.partition(".")
+
+    assert read_session_token(token, secret_key="other") is None
+    assert read_session_token(f"{payload}x.{signature}", secret_key="secret") is None
+    assert read_session_token("garbage", secret_key="secret") is None
+
+    expired = create_session_token(user, secret_key="secret", ttl_seconds=-1)
+    assert read_session_token(expired, secret_key="secret") is None
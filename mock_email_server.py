@@ -1,52 +1,289 @@
-"""Simple HTTP mock for external email API."""
+"""Concurrent HTTP mock for the external email API, suitable for load tests.
+
+Behaviour is configured with environment variables (or the matching CLI flags):
+
+- ``MOCK_EMAIL_LATENCY``: response latency distribution, one of ``none``,
+  ``fixed:<ms>``, ``uniform:<min_ms>:<max_ms>``, ``exp:<mean_ms>`` or
+  ``normal:<mean_ms>:<stddev_ms>``.
+- ``MOCK_EMAIL_ERROR_RATE``: probability (0-1) that a message fails with a 500,
+  or with a per-item error inside a bulk request.
+- ``MOCK_EMAIL_THROTTLE_RATE``: probability (0-1) that a request is rejected
+  with ``429`` and ``Retry-After: MOCK_EMAIL_RETRY_AFTER``.
+
+``GET /stats`` returns counters and percentiles of the handling time and of the
+injected latency, kept apart so the handling time shows the server's own
+overhead; ``DELETE /stats`` resets them. ``GET /inbox/<address>`` returns the
+latest message delivered to an address, so load tests can complete the
+activation flow with real codes.
+"""
 
 from __future__ import annotations
 
+import argparse
 import json
 import logging
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from typing import Any
-
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+from urllib.parse import unquote
 
 logging.basicConfig(level=logging.INFO, format="[MOCK-EMAIL] %(message)s")
 LOGGER = logging.getLogger("mock_email")
 
 
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Return a sampler yielding latencies in seconds for a distribution spec."""
+    kind, _, raw_args = spec.partition(":")
+    args = [float(value) / 1000 for value in raw_args.split(":") if value]
+    if kind in ("", "none"):
+        return lambda: 0.0
+    if kind == "fixed" and len(args) == 1:
+        return lambda: args[0]
+    if kind == "uniform" and len(args) == 2:
+        return lambda: random.uniform(args[0], args[1])
+    if kind == "exp" and len(args) == 1:
+        return lambda: random.expovariate(1 / args[0]) if args[0] > 0 else 0.0
+    if kind == "normal" and len(args) == 2:
+        return lambda: max(0.0, random.gauss(args[0], args[1]))
+    raise ValueError(f"Invalid latency distribution: {spec!r}")
+
+
+class Stats:
+    """Thread-safe counters plus bounded windows of handling times and injected delays."""
+
+    def __init__(self, window: int = 10_000) -> None:
+        self._lock = threading.Lock()
+        self._durations: deque[float] = deque(maxlen=window)
+        self._delays: deque[float] = deque(maxlen=window)
+        self._started = time.monotonic()
+        self._counters = {
+            "requests": 0,
+            "received": 0,
+            "delivered": 0,
+            "rejected": 0,
+            "throttled": 0,
+            "invalid": 0,
+        }
+
+    def record(self, duration: float, delay: float = 0.0, **counts: int) -> None:
+        """Record a request that took ``duration`` seconds on top of ``delay`` injected ones."""
+        with self._lock:
+            self._durations.append(duration)
+            self._delays.append(delay)
+            self._counters["requests"] += 1
+            for name, value in counts.items():
+                self._counters[name] += value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._durations.clear()
+            self._delays.clear()
+            self._started = time.monotonic()
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            durations = sorted(self._durations)
+            delays = sorted(self._delays)
+            counters = dict(self._counters)
+            elapsed = time.monotonic() - self._started
+
+        def percentiles(values: list[float]) -> dict[str, float | None]:
+            def percentile(fraction: float) -> float | None:
+                if not values:
+                    return None
+                index = min(len(values) - 1, int(len(values) * fraction))
+                return round(values[index] * 1000, 3)
+
+            return {"p50": percentile(0.5), "p99": percentile(0.99)}
+
+        return {
+            **counters,
+            "uptime_seconds": round(elapsed, 3),
+            "requests_per_second": round(counters["requests"] / elapsed, 3) if elapsed else 0,
+            "handling_ms": percentiles(durations),
+            "injected_delay_ms": percentiles(delays),
+        }
+
+
+class Inbox:
+    """Latest message per recipient, bounded so long runs don't grow unchecked."""
+
+    def __init__(self, max_recipients: int = 100_000) -> None:
+        self._lock = threading.Lock()
+        self._messages: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._max_recipients = max_recipients
+
+    def put(self, message: dict[str, Any]) -> None:
+        recipient = str(message["to"])
+        with self._lock:
+            previous = self._messages.pop(recipient, None)
+            self._messages[recipient] = {
+                "to": recipient,
+                "subject": message.get("subject"),
+                "body": message.get("body"),
+                "count": previous["count"] + 1 if previous else 1,
+            }
+            while len(self._messages) > self._max_recipients:
+                self._messages.popitem(last=False)
+
+    def get(self, recipient: str) -> dict[str, Any] | None:
+        with self._lock:
+            return self._messages.get(recipient)
+
+
+class MockBehaviour:
+    def __init__(
+        self,
+        latency: str = "none",
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: int = 1,
+    ) -> None:
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+    def should_throttle(self) -> bool:
+        return self.throttle_rate > 0 and random.random() < self.throttle_rate
+
+
+class MockEmailServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Must be set before listen(), which runs in the constructor.
+    request_queue_size = 1024
+
+
 class EmailRequestHandler(BaseHTTPRequestHandler):
-    server_version = "MockEmail/1.0"
+    server_version = "MockEmail/2.0"
+    protocol_version = "HTTP/1.1"
+    behaviour = MockBehaviour()
+    stats = Stats()
+    inbox = Inbox()
 
     def log_message(self, format: str, *args: Any) -> None:  # noqa: A003 - required signature
-        LOGGER.info(format, *args)
+        LOGGER.debug(format, *args)
+
+    def _send_json(self, status: int, payload: Any, headers: dict[str, str] | None = None) -> None:
+        response = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(response)
+
+    def _deliver(self, payload: Any) -> dict[str, str]:
+        if not isinstance(payload, dict) or not payload.get("to"):
+            return {"status": "error", "detail": "Missing recipient"}
+        if self.behaviour.should_fail():
+            return {"status": "error", "detail": "Injected failure"}
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug(
+                "Email dispatched to=%s subject=%s body=%s",
+                payload.get("to"),
+                payload.get("subject"),
+                payload.get("body"),
+            )
+        self.inbox.put(payload)
+        return {"status": "ok"}
+
+    def do_GET(self) -> None:  # noqa: N802 - required by BaseHTTPRequestHandler
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, self.stats.snapshot())
+            return
+        if self.path.startswith("/inbox/"):
+            message = self.inbox.get(unquote(self.path[len("/inbox/") :]))
+            if message is None:
+                self._send_json(404, {"detail": "No message for recipient"})
+            else:
+                self._send_json(200, message)
+            return
+        self._send_json(404, {"detail": "Not found"})
+
+    def do_DELETE(self) -> None:  # noqa: N802 - required by BaseHTTPRequestHandler
+        if self.path.rstrip("/") == "/stats":
+            self.stats.reset()
+            self._send_json(200, {"status": "reset"})
+            return
+        self._send_json(404, {"detail": "Not found"})
 
     def do_POST(self) -> None:  # noqa: N802 - required by BaseHTTPRequestHandler
+        started = time.perf_counter()
         content_length = int(self.headers.get("Content-Length", "0"))
         body = self.rfile.read(content_length)
+
+        delay = 0.0
+        latency = self.behaviour.sample_latency()
+        if latency:
+            slept = time.perf_counter()
+            time.sleep(latency)
+            delay = time.perf_counter() - slept
+
+        def record(**counts: int) -> None:
+            self.stats.record(time.perf_counter() - started - delay, delay, **counts)
+
+        if self.behaviour.should_throttle():
+            self._send_json(
+                429,
+                {"detail": "Too many requests"},
+                headers={"Retry-After": str(self.behaviour.retry_after)},
+            )
+            record(throttled=1)
+            return
+
         try:
             payload = json.loads(body.decode("utf-8"))
-        except json.JSONDecodeError:
-            self.send_response(400)
-            self.end_headers()
-            self.wfile.write(b"{\"detail\": \"Invalid JSON\"}")
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            self._send_json(400, {"detail": "Invalid JSON"})
+            record(invalid=1)
             return
 
-        LOGGER.info(
-            "Email dispatched to=%s subject=%s body=%s",
-            payload.get("to"),
-            payload.get("subject"),
-            payload.get("body"),
-        )
+        if self.path.rstrip("/").endswith("/bulk"):
+            messages = payload.get("messages") if isinstance(payload, dict) else None
+            if not isinstance(messages, list):
+                self._send_json(400, {"detail": "Expected a list of messages"})
+                record(invalid=1)
+                return
+            results = [self._deliver(message) for message in messages]
+            delivered = sum(result["status"] == "ok" for result in results)
+            self._send_json(200, {"results": results})
+            record(
+                received=len(results),
+                delivered=delivered,
+                rejected=len(results) - delivered,
+            )
+            return
 
-        response = json.dumps({"status": "ok"}).encode("utf-8")
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(response)))
-        self.end_headers()
-        self.wfile.write(response)
+        result = self._deliver(payload)
+        if result["status"] == "ok":
+            self._send_json(200, result)
+            record(received=1, delivered=1)
+        else:
+            status = 400 if result["detail"] == "Missing recipient" else 500
+            self._send_json(status, result)
+            record(received=1, rejected=1)
 
 
-def run(host: str = "0.0.0.0", port: int = 8080) -> None:
+def run(
+    host: str = "0.0.0.0",
+    port: int = 8080,
+    behaviour: MockBehaviour | None = None,
+) -> None:
+    if behaviour is not None:
+        EmailRequestHandler.behaviour = behaviour
     LOGGER.info("Starting mock email API on %s:%s", host, port)
-    server = HTTPServer((host, port), EmailRequestHandler)
+    server = MockEmailServer((host, port), EmailRequestHandler)
     try:
         server.serve_forever()
     except KeyboardInterrupt:  # pragma: no cover - manual stop
@@ -56,5 +293,30 @@ def run(host: str = "0.0.0.0", port: int = 8080) -> None:
         LOGGER.info("Mock email API stopped")
 
 
+def main() -> None:
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="Mock email API")
+    parser.add_argument("--host", default=env("MOCK_EMAIL_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(env("MOCK_EMAIL_PORT", "8080")))
+    parser.add_argument("--latency", default=env("MOCK_EMAIL_LATENCY", "none"))
+    parser.add_argument(
+        "--error-rate", type=float, default=float(env("MOCK_EMAIL_ERROR_RATE", "0"))
+    )
+    parser.add_argument(
+        "--throttle-rate", type=float, default=float(env("MOCK_EMAIL_THROTTLE_RATE", "0"))
+    )
+    parser.add_argument("--retry-after", type=int, default=int(env("MOCK_EMAIL_RETRY_AFTER", "1")))
+    parser.add_argument("--verbose", action="store_true", help="log every message body")
+    args = parser.parse_args()
+
+    if args.verbose or env("MOCK_EMAIL_VERBOSE"):
+        LOGGER.setLevel(logging.DEBUG)
+    run(
+        args.host,
+        args.port,
+        MockBehaviour(args.latency, args.error_rate, args.throttle_rate, args.retry_after),
+    )
+
+
 if __name__ == "__main__":
-    run()
+    main()